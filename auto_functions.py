@@ -1,24 +1,26 @@
 import logging
 from telegram.ext import ContextTypes
 from datetime import datetime, timedelta, timezone
-from fiturBot.attendance_bot import AttendanceBot
+from fiturBot.attendance_bot import get_async_attendance_bot
+from fiturBot.google_executor import AsyncGoogleProxy
+from fiturBot.cohorts import for_each_cohort
 from fiturBot.handlers.topic_utils import send_to_announcement_topic, send_to_assignment_topic
-from config import GROUP_CHAT_ID, GOOGLE_MEET_LINK
-from config import ANNOUNCEMENT_TOPIC_ID, TOPIC_NAMES, ASSIGNMENT_TOPIC_ID, ATTENDANCE_TOPIC_ID
+from config import TOPIC_NAMES
 
 
 logger = logging.getLogger(__name__)
 
 WIB = timezone(timedelta(hours=7))
 
-async def auto_check_attendance(context: ContextTypes.DEFAULT_TYPE):
-    """Fungsi otomatis untuk mengecek dan mengeluarkan murid"""
+@for_each_cohort
+async def auto_check_attendance(context: ContextTypes.DEFAULT_TYPE, cohort=None):
+    """Fungsi otomatis untuk mengecek dan mengeluarkan murid (per cohort)"""
     try:
-        # Validasi GROUP_CHAT_ID
-        if not GROUP_CHAT_ID or not isinstance(GROUP_CHAT_ID, int):
-            logger.error("❌ GROUP_CHAT_ID tidak valid untuk auto_check_attendance")
-        bot = AttendanceBot()
-        students_to_kick, students_to_warn = bot.check_auto_kick_conditions()
+        # Validasi chat ID grup cohort
+        if not cohort.chat_id or not isinstance(cohort.chat_id, int):
+            logger.error(f"❌ Chat ID cohort {cohort.name} tidak valid untuk auto_check_attendance")
+        bot = await get_async_attendance_bot(cohort)
+        students_to_kick, students_to_warn = await bot.check_auto_kick_conditions()
         
         # Kirim peringatan ke grup
         if students_to_warn and len(students_to_warn) > 0:
@@ -30,38 +32,57 @@ async def auto_check_attendance(context: ContextTypes.DEFAULT_TYPE):
             warning_message += "\n⚠️ Hadiri pertemuan selanjutnya!\nKarena 3x Alpha atau 3x Izin akan otomatis dikeluarkan dari grup"
             
             await context.bot.send_message(
-                chat_id=GROUP_CHAT_ID,
+                chat_id=cohort.chat_id,
                 text=warning_message
             )
         
         # Keluarkan murid yang memenuhi syarat
+        kicked_updates = []
         for student in students_to_kick:
             try:
                 await context.bot.ban_chat_member(
-                    chat_id=GROUP_CHAT_ID,
+                    chat_id=cohort.chat_id,
                     user_id=int(student['telegram_id'])
                 )
                 logger.info(f"Murid {student['nama']} dikeluarkan: {student['alasan']}")
+                kicked_updates.append(
+                    (student['telegram_id'], {'Status Terakhir': f"Dikeluarkan: {student['alasan'].strip()} - Otomatis"})
+                )
             except Exception as e:
                 logger.error(f"Error kicking student {student['nama']}: {e}")
+        
+        # Catat semua murid yang dikeluarkan dalam satu batch write
+        if kicked_updates:
+            await bot.apply_updates(kicked_updates)
                 
     except Exception as e:
         logger.error(f"Error in auto_check_attendance: {e}")
 
 async def periodic_check(context: ContextTypes.DEFAULT_TYPE):
-    """Pengecekan periodik"""
+    """Pengecekan periodik (semua cohort)"""
     await auto_check_attendance(context)
 
-async def send_classroom_reminder(context: ContextTypes.DEFAULT_TYPE):
+@for_each_cohort
+async def sync_roster_store(context: ContextTypes.DEFAULT_TYPE, cohort=None):
+    """Sinkronisasi store lokal dengan spreadsheet (push absensi, pull edit manual)"""
+    try:
+        bot = await get_async_attendance_bot(cohort)
+        await bot.sync_with_sheet()
+    except Exception as e:
+        logger.error(f"Error syncing roster store: {e}")
+
+@for_each_cohort
+async def send_classroom_reminder(context: ContextTypes.DEFAULT_TYPE, cohort=None):
     """Mengirim reminder untuk tugas yang belum dikumpulkan"""
     try:
-        bot = AttendanceBot()
+        bot = await get_async_attendance_bot(cohort)
         
         if bot.classroom_manager is None:
             logger.warning("Google Classroom tidak tersedia, skip reminder")
             return
         
-        unsubmitted_assignments = bot.classroom_manager.get_unsubmitted_assignments()
+        classroom = AsyncGoogleProxy(bot.classroom_manager)
+        unsubmitted_assignments = await classroom.get_unsubmitted_assignments()
         
         if not unsubmitted_assignments:
             message = "✅ **SEMUA TUGAS TELAH DIKUMPULKAN!**\n\nSelamat! Semua siswa telah mengumpulkan tugas mereka. 🎉"
@@ -77,17 +98,18 @@ async def send_classroom_reminder(context: ContextTypes.DEFAULT_TYPE):
             
             message += "📌 **Segera kumpulkan sebelum deadline!**"
 
-        logger.info(f"🔔 Sending class reminder to topic: {ASSIGNMENT_TOPIC_ID} ({TOPIC_NAMES.get(ASSIGNMENT_TOPIC_ID, 'Unknown')})")
+        logger.info(f"🔔 Sending class reminder to topic: {cohort.assignment_topic_id} ({TOPIC_NAMES.get(cohort.assignment_topic_id, 'Unknown')})")
 
         # Kirim ke topik TUGAS
-        await send_to_assignment_topic(context, message)
+        await send_to_assignment_topic(context, message, cohort=cohort)
         logger.info("✅ Classroom reminder sent successfully")
         
     except Exception as e:
         logger.error(f"Error sending classroom reminder: {e}")
 
 
-async def send_class_reminder(context: ContextTypes.DEFAULT_TYPE):
+@for_each_cohort
+async def send_class_reminder(context: ContextTypes.DEFAULT_TYPE, cohort=None):
     """Mengirim reminder kelas hari Senin ke topik PENGUMUMAN & INFO"""
     try:
         # Dapatkan tanggal Senin ini dan Senin depan
@@ -121,7 +143,7 @@ Jangan lupa hari ini ada Kelas!  🥰
 
 📅 Senin, {formatted_date}
 🕖 Pukul 19.00 WIB (zona waktu lain menyesuaikan)
-📍 Google Meet : {GOOGLE_MEET_LINK}
+📍 Google Meet : {cohort.meet_link}
 
 G-Meet akan dibuka 15 menit sebelum kelas dimulai
 
@@ -139,7 +161,7 @@ Jangan lupa Besok ada Kelas!  🥰
 
 📅 Senin, {formatted_date}
 🕖 Pukul 19.00 WIB (zona waktu lain menyesuaikan)
-📍 Google Meet : {GOOGLE_MEET_LINK}
+📍 Google Meet : {cohort.meet_link}
 
 \033G-Meet akan dibuka 15 menit sebelum kelas dimulai\033 
 
@@ -149,29 +171,32 @@ Siap kan buku catatan, semangat belajar, dan pastikan koneksi yang stabil!
 Have a nice day & спасибо! 🌟"""
         
         # DEBUG: Log topic yang digunakan
-        logger.info(f"🔔 Sending class reminder to topic: {ANNOUNCEMENT_TOPIC_ID} ({TOPIC_NAMES.get(ANNOUNCEMENT_TOPIC_ID, 'Unknown')})")
+        logger.info(f"🔔 Sending class reminder to topic: {cohort.announcement_topic_id} ({TOPIC_NAMES.get(cohort.announcement_topic_id, 'Unknown')})")
 
         # Kirim ke topik PENGUMUMAN & INFO
-        await send_to_announcement_topic(context, message)
-        logger.info(f"✅ Class reminder sent to PENGUMUMAN & INFO topic (ID: {ANNOUNCEMENT_TOPIC_ID})")
+        await send_to_announcement_topic(context, message, cohort=cohort)
+        logger.info(f"✅ Class reminder sent to PENGUMUMAN & INFO topic (ID: {cohort.announcement_topic_id})")
         
     except Exception as e:
         logger.error(f"Error sending class reminder: {e}")
 
-async def reminder_tugas_classroom(context: ContextTypes.DEFAULT_TYPE):
+@for_each_cohort
+async def reminder_tugas_classroom(context: ContextTypes.DEFAULT_TYPE, cohort=None):
     """Fungsi reminder tugas classroom yang dijalankan setiap hari"""
     try:
-        bot = AttendanceBot()
+        bot = await get_async_attendance_bot(cohort)
         
         if bot.classroom_manager is None:
             logger.warning("Google Classroom tidak tersedia, skip daily reminder")
             return
         
+        classroom = AsyncGoogleProxy(bot.classroom_manager)
+
         # Dapatkan tugas yang mendekati deadline
-        upcoming_assignments = bot.classroom_manager.get_upcoming_assignments()
+        upcoming_assignments = await classroom.get_upcoming_assignments()
         
         # Dapatkan tugas yang terlambat
-        overdue_assignments = bot.classroom_manager.get_overdue_assignments()
+        overdue_assignments = await classroom.get_overdue_assignments()
         
         current_time = datetime.now(WIB)
         current_date = current_time.strftime("%d %B %Y")
@@ -216,24 +241,26 @@ async def reminder_tugas_classroom(context: ContextTypes.DEFAULT_TYPE):
             message += random.choice(motivation_tips)
         
         # Kirim reminder ke topik TUGAS
-        logger.info(f"🔔 Sending daily classroom reminder to topic: {ASSIGNMENT_TOPIC_ID}")
-        await send_to_assignment_topic(context, message)
+        logger.info(f"🔔 Sending daily classroom reminder to topic: {cohort.assignment_topic_id}")
+        await send_to_assignment_topic(context, message, cohort=cohort)
         logger.info("✅ Daily classroom reminder sent successfully")
         
     except Exception as e:
         logger.error(f"Error in reminder_tugas_classroom: {e}")
 
-async def reminder_tugas_mingguan(context: ContextTypes.DEFAULT_TYPE):
+@for_each_cohort
+async def reminder_tugas_mingguan(context: ContextTypes.DEFAULT_TYPE, cohort=None):
     """Fungsi reminder tugas mingguan (setiap Senin)"""
     try:
-        bot = AttendanceBot()
+        bot = await get_async_attendance_bot(cohort)
         
         if bot.classroom_manager is None:
             logger.warning("Google Classroom tidak tersedia, skip weekly reminder")
             return
         
         # Dapatkan semua tugas aktif
-        all_assignments = bot.classroom_manager.get_all_active_assignments()
+        classroom = AsyncGoogleProxy(bot.classroom_manager)
+        all_assignments = await classroom.get_all_active_assignments()
         
         current_time = datetime.now(WIB)
         current_date = current_time.strftime("%d %B %Y")
@@ -282,8 +309,8 @@ async def reminder_tugas_mingguan(context: ContextTypes.DEFAULT_TYPE):
             message += "\n💪 **Semangat mengerjakan tugas! Jangan menunda-nunda!**"
         
         # Kirim reminder mingguan ke topik TUGAS
-        logger.info(f"🔔 Sending weekly classroom reminder to topic: {ASSIGNMENT_TOPIC_ID}")
-        await send_to_assignment_topic(context, message)
+        logger.info(f"🔔 Sending weekly classroom reminder to topic: {cohort.assignment_topic_id}")
+        await send_to_assignment_topic(context, message, cohort=cohort)
         logger.info("✅ Weekly classroom reminder sent successfully")
         
     except Exception as e:
@@ -291,6 +318,6 @@ async def reminder_tugas_mingguan(context: ContextTypes.DEFAULT_TYPE):
 
 
 async def periodic_check(context: ContextTypes.DEFAULT_TYPE):
-    """Pengecekan periodik"""
+    """Pengecekan periodik (semua cohort)"""
     await auto_check_attendance(context)
 
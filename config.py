@@ -127,6 +127,71 @@ TOPIC_NAMES = {
     4: "Perihal Absensi Kelas"
 }
 
+# ==================== ROSTER STORE CONFIG ====================
+# Database SQLite lokal (sumber data utama handler)
+ROSTER_DB_FILE = os.getenv('ROSTER_DB_FILE', 'roster.db')
+# Jarak minimal antar pengecekan edit manual di spreadsheet (detik)
+ROSTER_PULL_INTERVAL = safe_int_convert(os.getenv('ROSTER_PULL_INTERVAL', '300'), 300)
+# Interval push absensi dari store lokal ke spreadsheet (detik)
+ATTENDANCE_FLUSH_INTERVAL = safe_int_convert(os.getenv('ATTENDANCE_FLUSH_INTERVAL', '10'), 10)
+# Jumlah pendaftaran yang diantrikan sebelum langsung ditulis dengan append_rows
+REGISTRATION_BATCH_SIZE = safe_int_convert(os.getenv('REGISTRATION_BATCH_SIZE', '20'), 20)
+# Worksheet salinan riwayat absensi per sesi (dibuat otomatis jika belum ada)
+ATTENDANCE_HISTORY_WORKSHEET = os.getenv('ATTENDANCE_HISTORY_WORKSHEET', 'Riwayat Absensi')
+# Journal JSONL versi lama, isinya dipindahkan ke store saat startup
+ATTENDANCE_JOURNAL_FILE = os.getenv('ATTENDANCE_JOURNAL_FILE', 'attendance_journal.jsonl')
+
+# ==================== GOOGLE I/O CONFIG ====================
+# Jumlah thread untuk panggilan Google Sheets/Classroom (di luar event loop)
+GOOGLE_IO_WORKERS = safe_int_convert(os.getenv('GOOGLE_IO_WORKERS', '4'), 4)
+# Jumlah thread untuk operasi store lokal (SQLite) dari handler, terpisah dari Google I/O
+LOCAL_IO_WORKERS = safe_int_convert(os.getenv('LOCAL_IO_WORKERS', '4'), 4)
+# Budget request Google Sheets per menit & jumlah retry untuk error 429/5xx
+SHEETS_READS_PER_MINUTE = safe_int_convert(os.getenv('SHEETS_READS_PER_MINUTE', '60'), 60)
+SHEETS_WRITES_PER_MINUTE = safe_int_convert(os.getenv('SHEETS_WRITES_PER_MINUTE', '60'), 60)
+SHEETS_MAX_RETRIES = safe_int_convert(os.getenv('SHEETS_MAX_RETRIES', '5'), 5)
+# Jumlah request per batch HTTP Classroom (lookup profil siswa), maksimal 100
+CLASSROOM_BATCH_SIZE = min(safe_int_convert(os.getenv('CLASSROOM_BATCH_SIZE', '100'), 100), 100)
+# Jumlah item per halaman untuk list Classroom (courseWork, studentSubmissions, students)
+CLASSROOM_PAGE_SIZE = safe_int_convert(os.getenv('CLASSROOM_PAGE_SIZE', '100'), 100)
+# Umur maksimal snapshot Classroom (tugas, roster, submission) yang dipakai bersama job & command (detik)
+CLASSROOM_SNAPSHOT_TTL = safe_int_convert(os.getenv('CLASSROOM_SNAPSHOT_TTL', '600'), 600)
+# Folder salinan snapshot di disk agar tetap terpakai setelah restart
+CLASSROOM_SNAPSHOT_DIR = os.getenv('CLASSROOM_SNAPSHOT_DIR', 'classroom_cache')
+# Jumlah update Telegram yang diproses bersamaan (1 = berurutan)
+CONCURRENT_UPDATES = safe_int_convert(os.getenv('CONCURRENT_UPDATES', '8'), 8)
+
+# ==================== COHORT CONFIG ====================
+# Beberapa kelas (cohort) dalam satu proses bot. JSON list di COHORTS atau di file
+# yang ditunjuk COHORTS_FILE, contoh:
+#   [{"name": "Batch 1", "chat_id": -1001111111111, "spreadsheet_url": "https://...",
+#     "worksheet_name": "Sheet1", "classroom_course_id": "123", "announcement_topic_id": 3,
+#     "assignment_topic_id": 2, "attendance_topic_id": 4, "meet_link": "meet.google.com/..."}]
+# Kolom yang tidak diisi memakai nilai default di atas. Jika kosong, bot melayani satu
+# cohort dari GROUP_CHAT_ID / SPREADSHEET_URL seperti sebelumnya.
+def load_cohorts_config():
+    """List dict cohort dari COHORTS / COHORTS_FILE, [] jika tidak diset"""
+    raw = os.getenv('COHORTS', '').strip()
+    cohorts_file = os.getenv('COHORTS_FILE')
+    try:
+        if not raw and cohorts_file:
+            with open(cohorts_file, 'r', encoding='utf-8') as f:
+                raw = f.read().strip()
+        if not raw:
+            return []
+        cohorts = json.loads(raw)
+        if not isinstance(cohorts, list):
+            raise ValueError("COHORTS harus berupa JSON list")
+        print(f"✅ COHORTS: {len(cohorts)} cohort")
+        return cohorts
+    except (OSError, ValueError) as e:
+        print(f"❌ Error parsing COHORTS: {e}")
+        return []
+
+COHORTS = load_cohorts_config()
+# Maksimal cohort yang diproses bersamaan oleh satu job terjadwal
+COHORT_JOB_CONCURRENCY = safe_int_convert(os.getenv('COHORT_JOB_CONCURRENCY', '3'), 3)
+
 def setup_admin_commands(application, admin_ids):
     """Setup commands khusus untuk admin"""
     
@@ -205,8 +270,24 @@ def setup_credentials():
         print("   - CREDENTIALS_FILE environment variable")
         return None
     
-# Setup credentials
-CREDENTIALS_FILE = setup_credentials()
+# Setup credentials dijalankan saat pertama dibutuhkan (validate_config / client Google),
+# bukan saat config di-import
+_credentials_file = None
+_credentials_ready = False
+
+def get_credentials_file():
+    """Path credentials; setup_credentials() hanya dijalankan sekali"""
+    global _credentials_file, _credentials_ready
+    if not _credentials_ready:
+        _credentials_file = setup_credentials()
+        _credentials_ready = True
+    return _credentials_file
+
+def __getattr__(name):
+    # `from config import CREDENTIALS_FILE` tetap bisa dipakai
+    if name == 'CREDENTIALS_FILE':
+        return get_credentials_file()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Google API Scopes
 SCOPES = [
@@ -247,12 +328,15 @@ def validate_config():
     else:
         print("💻 Running LOCALLY")
     
-    # Validasi required variables
-    required_vars = {
-        'BOT_TOKEN': BOT_TOKEN,
-        'GROUP_CHAT_ID': GROUP_CHAT_ID,
-        'SPREADSHEET_URL': SPREADSHEET_URL,
-    }
+    # Validasi required variables (grup & spreadsheet boleh diganti COHORTS)
+    required_vars = {'BOT_TOKEN': BOT_TOKEN}
+    if COHORTS:
+        for position, cohort in enumerate(COHORTS):
+            if not isinstance(cohort, dict) or not cohort.get('chat_id') or not cohort.get('spreadsheet_url'):
+                errors.append(f"COHORTS[{position}] wajib berisi chat_id dan spreadsheet_url")
+    else:
+        required_vars['GROUP_CHAT_ID'] = GROUP_CHAT_ID
+        required_vars['SPREADSHEET_URL'] = SPREADSHEET_URL
     
     for var_name, var_value in required_vars.items():
         if not var_value:
@@ -265,13 +349,14 @@ def validate_config():
             print(f"✅ {var_name}: {display_value}")
     
     # Validasi file credentials
-    if not CREDENTIALS_FILE:
+    credentials_file = get_credentials_file()
+    if not credentials_file:
         errors.append("CREDENTIALS_FILE tidak dikonfigurasi")
     else:
-        print(f"✅ CREDENTIALS_FILE: {CREDENTIALS_FILE}")
+        print(f"✅ CREDENTIALS_FILE: {credentials_file}")
         # Cek file exists hanya jika CREDENTIALS_FILE adalah string path
-        if isinstance(CREDENTIALS_FILE, str) and not os.path.exists(CREDENTIALS_FILE):
-            errors.append(f"File {CREDENTIALS_FILE} tidak ditemukan")
+        if isinstance(credentials_file, str) and not os.path.exists(credentials_file):
+            errors.append(f"File {credentials_file} tidak ditemukan")
 
     # Validasi format GROUP_CHAT_ID
     if GROUP_CHAT_ID and GROUP_CHAT_ID > 0:
@@ -323,8 +408,6 @@ def validate_config():
     print("✅ Konfigurasi berhasil divalidasi!")
     return True
 
-# Jalankan validasi saat module di-load
+# Validasi dijalankan oleh main.py (atau `python config.py`), tidak lagi saat module di-import
 if __name__ == "__main__":
-    validate_config()
-else:
-    config_valid = validate_config()
\ No newline at end of file
+    validate_config()
\ No newline at end of file
@@ -1,5 +1,17 @@
 # Package initialization
-from .attendance_bot import AttendanceBot
-from .classroom_manager import ClassroomManager
+# Export di-load saat pertama diakses agar `import fiturBot.<submodule>` tetap ringan
+import importlib
 
-__all__ = ['AttendanceBot', 'ClassroomManager']
\ No newline at end of file
+_EXPORTS = {
+    'AttendanceBot': '.attendance_bot',
+    'get_attendance_bot': '.attendance_bot',
+    'ClassroomManager': '.classroom_manager',
+}
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(module_name, __name__), name)
+
+__all__ = ['AttendanceBot', 'ClassroomManager', 'get_attendance_bot']
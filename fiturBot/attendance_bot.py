@@ -1,40 +1,98 @@
-import gspread
-import pandas as pd
-import os
 import logging
-import schedule
+import re
 import time
-from google.oauth2.service_account import Credentials
-from config import SCOPES, CREDENTIALS_FILE, SPREADSHEET_URL, WORKSHEET_NAME, CLASSROOM_COURSE_ID
+from config import ROSTER_PULL_INTERVAL, REGISTRATION_BATCH_SIZE, ATTENDANCE_JOURNAL_FILE
+from .classroom_snapshot import classroom_snapshots
 from .classroom_manager import ClassroomManager
-from datetime import datetime
-from threading import Thread
-from googleapiclient.discovery import build
+from .cohorts import cohort_registry
+from .google_clients import google_clients
+from .roster import Roster, Student, parse_int
+from .roster_store import RosterStore, COUNTER_COLUMNS, apply_pending
+from .roster_export import write_csv
+from .sheets_gateway import SheetsGateway, may_have_been_written
+from .google_executor import AsyncGoogleProxy, run_google_io, run_local_io
+from dataclasses import dataclass
+from datetime import datetime, timezone, timedelta
+from threading import Thread, Lock, RLock
 
 logger = logging.getLogger(__name__)
 
+WIB = timezone(timedelta(hours=7))
+
+# Kolom worksheet riwayat absensi & jumlah baris per append_rows. 'ID Event' (id di
+# attendance_events) dipakai untuk mengenali baris yang sudah tersalin
+HISTORY_HEADER = ['Tanggal Sesi', 'Telegram ID', 'Nama', 'Status', 'Waktu', 'ID Event']
+HISTORY_MIRROR_BATCH = 500
+
+def history_row(event):
+    """Satu baris riwayat absensi sesuai HISTORY_HEADER"""
+    return [event['session_date'], event['telegram_id'], event['nama'] or '',
+            event['status'], event['created_at'], event['id']]
+
+@dataclass(frozen=True)
+class AttendanceResult:
+    """Hasil pencatatan absensi satu murid (nilai sebelum & sesudah)"""
+    telegram_id: int
+    nama: str
+    status: str
+    hadir_before: int
+    hadir_after: int
+    alpha_before: int
+    alpha_after: int
+    izin_before: int
+    izin_after: int
+    status_before: str
+    status_after: str
+
 class AttendanceBot:
-    def __init__(self):
+    # Method yang hanya memakai store lokal/roster di memori: lewat AsyncGoogleProxy
+    # dijalankan di executor lokal, tidak mengantri di belakang request Google.
+    # (get_roster/get_student_data dengan force_refresh=True tetap harus lewat pull_from_sheet)
+    LOCAL_METHODS = frozenset({
+        'get_roster', 'get_student_data', 'get_roster_summary', 'get_student_columns',
+        'find_student', 'find_student_by_email', 'update_student_record', 'get_student_emails',
+        'get_session_attendance', 'get_student_history', 'export_csv', 'check_auto_kick_conditions',
+    })
+
+    def __init__(self, cohort=None):
+        # Spreadsheet, worksheet & course Classroom milik satu cohort (kelas)
+        self.cohort = cohort or cohort_registry.default
         self.gc = None
         self.worksheet = None
+        self.history_worksheet = None
         self.classroom_manager = None
         self.classroom_service = None
-        self.setup_sheets()
+        # Store SQLite lokal adalah sumber data utama; spreadsheet disinkronkan di background
+        # (journal JSONL versi lama hanya milik cohort default)
+        legacy_journal = ATTENDANCE_JOURNAL_FILE if self.cohort == cohort_registry.default else None
+        self.store = RosterStore(self.cohort.roster_db_file, legacy_journal)
+        # Salinan data murid di memori (Roster berisi Student + index ID/email, dibangun dari store)
+        self._roster = None
+        self._roster_lock = RLock()
+        self._header = None  # Nama kolom sesuai baris 1 spreadsheet
+        # Lock per Telegram ID agar increment counter tidak hilang saat update diproses paralel
+        self._student_locks = {}
+        self._student_locks_guard = Lock()
+        # Push & pull ke spreadsheet tidak boleh berjalan bersamaan
+        self._flush_lock = RLock()
+        self._last_pull = 0
+        try:
+            self.setup_sheets()
+        except Exception:
+            if not self.store.has_snapshot():
+                raise
+            logger.warning("📴 Google Sheets tidak bisa dihubungi, bot berjalan dari data lokal")
         self.setup_classroom()
     
     def setup_sheets(self):
         """Setup koneksi ke Google Sheets"""
         try:
-            logger.info("Memulai koneksi ke Google Sheets...")
+            logger.info(f"Memulai koneksi ke Google Sheets ({self.cohort.name})...")
             
-            # Validasi file credentials
-            if not os.path.exists(CREDENTIALS_FILE):
-                raise FileNotFoundError(f"File {CREDENTIALS_FILE} tidak ditemukan!")
-            
-            # Setup credentials dan koneksi
-            creds = Credentials.from_service_account_file(CREDENTIALS_FILE, scopes=SCOPES)
-            self.gc = gspread.authorize(creds)
-            self.worksheet = self.gc.open_by_url(SPREADSHEET_URL).worksheet(WORKSHEET_NAME)
+            # Client & worksheet diambil dari registry bersama (tidak authorize ulang);
+            # setiap request worksheet lewat gateway kuota (throttle + retry 429/5xx)
+            self.gc = google_clients.get_gspread_client()
+            self.worksheet = SheetsGateway(google_clients.get_worksheet(self.cohort.spreadsheet_url, self.cohort.worksheet_name))
             
             logger.info("✅ Berhasil terhubung ke Google Sheets!")
             
@@ -45,129 +103,621 @@ class AttendanceBot:
     def setup_classroom(self):
         """Setup koneksi ke Google Classroom"""
         try:
-            self.classroom_manager = ClassroomManager()
+            self.classroom_manager = ClassroomManager(self.cohort.classroom_course_id)
         except Exception as e:
             logger.warning(f"Google Classroom tidak tersedia: {e}")
             self.classroom_manager = None
     
+    def reconnect(self):
+        """Buat ulang koneksi Google setelah error jaringan / token"""
+        google_clients.reconnect()
+        self.classroom_service = None
+        self.history_worksheet = None
+        self.setup_sheets()
+        self.setup_classroom()
+    
     def get_credentials(self):
         """Mendapatkan credentials untuk Google API"""
         try:
-            return Credentials.from_service_account_file(CREDENTIALS_FILE, scopes=SCOPES)
+            return google_clients.get_credentials()
         except Exception as e:
             logger.error(f"Error getting credentials: {e}")
             return None
     
-    def get_student_data(self):
-        """Mengambil data murid dari spreadsheet dan konversi tipe data"""
+    def get_roster(self, force_refresh=False):
+        """Roster murid dari store lokal (tanpa request ke Google).
+
+        force_refresh=True mengambil ulang data dari spreadsheet lebih dulu.
+        Roster yang dikembalikan dipakai bersama, jangan diubah langsung.
+        """
+        if force_refresh:
+            self.pull_from_sheet(force=True)
+        with self._roster_lock:
+            if self._roster is None:
+                self._load_from_store()
+        if self._roster is None:
+            # Store masih kosong (pertama kali jalan): ambil dari spreadsheet
+            self.pull_from_sheet(force=True)
+        return self._roster if self._roster is not None else Roster([])
+
+    def get_student_data(self, force_refresh=False):
+        """Data murid sebagai DataFrame baru, untuk export & analitik saja.
+
+        Handler yang hanya butuh satu murid atau total sebaiknya memakai
+        find_student() / get_roster_summary().
+        """
+        return self.get_roster(force_refresh).to_dataframe()
+
+    def get_roster_summary(self):
+        """Jumlah murid, total Hadir/Alpha/Izin, dan jumlah murid dengan peringatan (O(1), agregat inkremental)"""
+        return self.get_roster().summary()
+
+    def _load_from_store(self):
+        """Bangun Roster di memori dari store SQLite"""
+        with self._roster_lock:
+            header, rows = self.store.load_records()
+            if header is None:
+                return
+            self._roster = Roster.from_records(header, rows)
+            self._header = list(header)
+
+    def _get_sheet_modified_time(self):
+        """modifiedTime spreadsheet dari Drive API (request kecil), None jika gagal"""
         try:
-            data = self.worksheet.get_all_records()
-            df = pd.DataFrame(data)
+            drive_service = google_clients.get_service('drive', 'v3')
+            metadata = drive_service.files().get(
+                fileId=self.worksheet.spreadsheet_id,
+                fields='modifiedTime'
+            ).execute()
+            return metadata.get('modifiedTime')
+        except Exception as e:
+            logger.warning(f"⚠️ Gagal cek modifiedTime spreadsheet: {e}")
+            return None
+
+    def pull_from_sheet(self, force=False):
+        """Ambil edit manual dari spreadsheet ke store lokal.
+
+        Download penuh hanya dilakukan jika modifiedTime spreadsheet berubah sejak
+        pull terakhir (atau force=True). Return True jika store diperbarui.
+        """
+        with self._flush_lock:
+            try:
+                if self.worksheet is None:
+                    self.setup_sheets()
+                # Catat modifiedTime sebelum download agar edit di tengah download tidak terlewat
+                modified_time = self._get_sheet_modified_time()
+                if not force and modified_time is not None and modified_time == self.store.get_meta('modified_time'):
+                    logger.info("♻️ Spreadsheet tidak berubah, data lokal tetap dipakai")
+                    return False
+
+                header, records = self._fetch_student_records()
+                if not records:
+                    return False
+                with self._roster_lock:
+                    self.store.replace_snapshot(header, records, modified_time)
+                    self._load_from_store()
+                logger.info(f"⬇️ Pull spreadsheet: {len(records)} murid disimpan ke store lokal")
+                return True
+
+            except Exception as e:
+                logger.error(f"Error pulling from spreadsheet: {e}")
+                return False
 
-            # Konversi kolom numerik dari string ke integer
-            numeric_columns = ['Total Alpha', 'Total Izin', 'Telegram ID']
+    def sync_with_sheet(self):
+        """Sinkronisasi dua arah: push outbox ke spreadsheet, lalu pull edit manual admin"""
+        pushed = self.flush_journal()
+        self.mirror_attendance_events()
+        if time.monotonic() - self._last_pull >= ROSTER_PULL_INTERVAL:
+            self.pull_from_sheet()
+            self.reconcile_aggregates()
+            self._last_pull = time.monotonic()
+        return pushed
 
-            for col in numeric_columns:
-                if col in df.columns:
+    def reconcile_aggregates(self):
+        """Cocokkan agregat dashboard admin dengan hitung ulang penuh roster"""
+        with self._roster_lock:
+            return self._roster.reconcile() if self._roster is not None else {}
+
+    def _get_history_worksheet(self):
+        """Worksheet riwayat absensi, dibuat (dengan header) jika belum ada"""
+        if self.history_worksheet is None:
+            from gspread.exceptions import WorksheetNotFound
+            try:
+                worksheet = google_clients.get_worksheet(self.cohort.spreadsheet_url, self.cohort.history_worksheet_name)
+                if len(worksheet.row_values(1)) < len(HISTORY_HEADER):
+                    # Worksheet versi lama belum punya kolom 'ID Event'
+                    worksheet.update([HISTORY_HEADER], 'A1')
+            except WorksheetNotFound:
+                spreadsheet = google_clients.get_gspread_client().open_by_url(self.cohort.spreadsheet_url)
+                worksheet = spreadsheet.add_worksheet(
+                    title=self.cohort.history_worksheet_name, rows=1000, cols=len(HISTORY_HEADER)
+                )
+                worksheet.append_row(HISTORY_HEADER)
+                logger.info(f"✅ Worksheet '{self.cohort.history_worksheet_name}' dibuat")
+            self.history_worksheet = SheetsGateway(worksheet)
+        return self.history_worksheet
+
+    def _mark_events_already_mirrored(self, worksheet):
+        """Tandai event yang ternyata sudah ada di worksheet riwayat (satu baca kolom 'ID Event')"""
+        pending = self.store.unmirrored_events(1)
+        if pending:
+            first_id = pending[0]['id']
+            in_sheet = {self._normalize_id(value) for value in worksheet.col_values(len(HISTORY_HEADER))[1:]}
+            mirrored = sorted(event_id for event_id in in_sheet if event_id is not None and event_id >= first_id)
+            if mirrored:
+                self.store.mark_events_mirrored(mirrored)
+                logger.warning(f"⚠️ {len(mirrored)} riwayat absensi ternyata sudah tersalin, tidak di-append ulang")
+        self.store.set_meta('history_unconfirmed', False)
+
+    def mirror_attendance_events(self):
+        """Salin riwayat absensi yang belum ada di worksheet riwayat (append_rows per batch).
+
+        Jika append sebelumnya gagal dengan error selain 429, baris bisa saja sudah
+        tertulis; kolom 'ID Event' dicek dulu agar riwayat tidak tersalin dua kali.
+        """
+        with self._flush_lock:
+            try:
+                worksheet = self._get_history_worksheet()
+                if self.store.get_meta('history_unconfirmed'):
+                    self._mark_events_already_mirrored(worksheet)
+                events = self.store.unmirrored_events(HISTORY_MIRROR_BATCH)
+                while events:
                     try:
-                        # Coba konversi langsung ke numeric
-                        df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype(int)
-                    except:
-                        # Jika gagal, bersihkan string terlebih dahulu
-                        df[col] = pd.to_numeric(
-                            df[col].astype(str).str.replace('[^0-9.-]', '', regex=True), 
-                            errors='coerce'
-                        ).fillna(0).astype(int)
-
-            logger.info(f"📊 Berhasil membaca {len(df)} records")
-            logger.info(f"📈 Sample data - Alpha: {df['Total Alpha'].iloc[0] if len(df) > 0 else 'N/A'}, Izin: {df['Total Izin'].iloc[0] if len(df) > 0 else 'N/A'}")
-            return df
+                        worksheet.append_rows([history_row(event) for event in events])
+                    except Exception as e:
+                        if may_have_been_written(e):
+                            self.store.set_meta('history_unconfirmed', True)
+                        raise
+                    self.store.mark_events_mirrored([event['id'] for event in events])
+                    logger.info(f"🗂️ {len(events)} riwayat absensi disalin ke '{self.cohort.history_worksheet_name}'")
+                    events = self.store.unmirrored_events(HISTORY_MIRROR_BATCH)
+                return True
+            except Exception as e:
+                logger.error(f"Error mirroring attendance history: {e}")
+                return False
+
+    def get_session_attendance(self, session_date):
+        """Status terakhir setiap murid pada satu sesi: {telegram_id: event}.
+
+        session_date: date/datetime atau string 'YYYY-MM-DD' (tanggal WIB).
+        """
+        if hasattr(session_date, 'strftime'):
+            session_date = session_date.strftime('%Y-%m-%d')
+        latest = {}
+        for event in self.store.get_session_events(session_date):
+            latest[event['telegram_id']] = event
+        return latest
+
+    def get_student_history(self, telegram_id, since=None):
+        """Riwayat absensi satu murid (list event, urut waktu)"""
+        return self.store.get_student_history(self._normalize_id(telegram_id), since)
+
+    def export_csv(self, export_filter):
+        """Export CSV dari data lokal (roster di memori / riwayat di store) ke file sementara.
+
+        Baris dibentuk lewat generator dan ditulis per potongan, jadi tidak ada
+        salinan penuh data di memori. Return (file, jumlah_baris).
+        """
+        roster = self.get_roster()
+        if export_filter.history:
+            rows = (
+                history_row(event)
+                for event in self.store.iter_events(export_filter.date_from, export_filter.date_to)
+                if export_filter.match_status(event['status'])
+                and export_filter.match_thresholds(roster.find(event['telegram_id']))
+            )
+            return write_csv(HISTORY_HEADER, rows, export_filter.compress)
+
+        header = roster.header
+        rows = (
+            [student.get(column, '') for column in header]
+            for student in list(roster)
+            if export_filter.match_status(student.status_terakhir) and export_filter.match_thresholds(student)
+        )
+        return write_csv(header, rows, export_filter.compress)
+
+    def get_student_columns(self, columns):
+        """DataFrame berisi kolom tertentu saja (dari store lokal), untuk analitik"""
+        return self.get_roster().to_dataframe(columns)
+
+    def invalidate_cache(self):
+        """Buang salinan di memori agar dibangun ulang dari store lokal"""
+        with self._roster_lock:
+            self._roster = None
+        logger.info("🧹 Cache data murid dikosongkan")
+
+    @staticmethod
+    def _normalize_id(telegram_id):
+        """Telegram ID dari int/str ('123', ' 123 ') menjadi int, None jika tidak valid"""
+        try:
+            return int(str(telegram_id).strip())
+        except (ValueError, TypeError):
+            return None
+
+    def find_student(self, telegram_id):
+        """Cari murid berdasarkan Telegram ID, return (nomor_baris, Student) atau (None, None)"""
+        student = self.get_roster().find(self._normalize_id(telegram_id))
+        if student is None:
+            return None, None
+        return student.row, student
+
+    def find_student_by_email(self, email):
+        """Cari murid berdasarkan email (tidak case-sensitive), return (nomor_baris, Student) atau (None, None)"""
+        student = self.get_roster().find_by_email(email)
+        if student is None:
+            return None, None
+        return student.row, student
+
+    def _patch_cached_student(self, telegram_id, changes):
+        """Samakan salinan di memori dengan perubahan yang baru disimpan"""
+        with self._roster_lock:
+            student = self._roster.find(self._normalize_id(telegram_id)) if self._roster else None
+            if student is None:
+                self._roster = None
+                return
+            self._roster.update(student, changes)
+
+    def _fetch_student_records(self):
+        """Mengambil semua baris murid dari spreadsheet, return (header, [record dict, ...])"""
+        try:
+            try:
+                values = self.worksheet.get_values()
+            except Exception as e:
+                # Koneksi bersama bisa putus/kadaluarsa: sambung ulang lalu coba sekali lagi
+                logger.warning(f"⚠️ Gagal membaca spreadsheet, mencoba reconnect: {e}")
+                self.reconnect()
+                values = self.worksheet.get_values()
+            if not values:
+                return [], []
+
+            # Nilai mentah (string); konversi angka dilakukan sekali oleh Student
+            header = values[0]
+            records = [dict(zip(header, row)) for row in values[1:]]
+            logger.info(f"📊 Berhasil membaca {len(records)} records")
+            return header, records
         
         except Exception as e:
             logger.error(f"Error getting student data: {e}")
-            return pd.DataFrame()
-    
+            return [], []
+
+    def _student_lock(self, telegram_id):
+        """Lock milik satu murid (dibuat saat pertama dipakai)"""
+        key = self._normalize_id(telegram_id)
+        with self._student_locks_guard:
+            lock = self._student_locks.get(key)
+            if lock is None:
+                lock = self._student_locks[key] = Lock()
+            return lock
+
     def update_student_record(self, telegram_id, status):
-        """Update record kehadiran murid (simpan data angka)"""
+        """Update record kehadiran murid (simpan data angka).
+
+        Baca nilai lama, tambah satu, dan tulis dilakukan di bawah lock milik murid
+        tersebut, jadi dua absensi bersamaan untuk murid yang sama tidak saling
+        menimpa. _roster_lock ikut dipegang agar pull/push tidak mengganti roster
+        di memori di antara baca dan tulis. Return AttendanceResult berisi nilai
+        sebelum & sesudah, atau None jika gagal.
+        """
+        with self._student_lock(telegram_id), self._roster_lock:
+            return self._update_student_record(telegram_id, status)
+
+    def _update_student_record(self, telegram_id, status):
+        """Isi update_student_record(), dipanggil saat lock murid sudah dipegang"""
         try:
-            df = self.get_student_data()
-            if df.empty:
-                return False
-            
-            # Cari baris berdasarkan Telegram ID
-            for idx, row in df.iterrows():
-                if str(row['Telegram ID']) == str(telegram_id):
-                    # Konversi nilai saat ini ke integer (pastikan angka)
-                    current_alpha = int(row['Total Alpha']) if pd.notna(row['Total Alpha']) else 0
-                    current_izin = int(row['Total Izin']) if pd.notna(row['Total Izin']) else 0
-
-                    # Update total alpha atau izin berdasarkan status
-                    if status == 'Alpha':
-                        # Update Total Alpha (angka) dan Status Terakhir (teks)
-                        new_alpha = current_alpha + 1
-                        self.worksheet.update_cell(idx + 2, 5, new_alpha)  # Kolom D: Total Alpha (angka)
-                        self.worksheet.update_cell(idx + 2, 7, 'Alpha')     # Kolom F: Status Terakhir (teks)
-                        logger.info(f"✅ Updated Alpha for {row['Nama']}: {current_alpha} → {new_alpha}")
-
-                    elif status == 'Izin':
-                        # Update Total Izin (angka) dan Status Terakhir (teks)
-                        new_izin = current_izin + 1
-                        self.worksheet.update_cell(idx + 2, 6, new_izin)   # Kolom E: Total Izin (angka)
-                        self.worksheet.update_cell(idx + 2, 7, 'Izin')     # Kolom F: Status Terakhir (teks)
-                        logger.info(f"✅ Updated Izin for {row['Nama']}: {current_izin} → {new_izin}")
-
-                    # Untuk status 'Hadir', hanya update status terakhir saja
-                    elif status == 'Hadir':
-                        # Hanya update Status Terakhir (teks), angka tetap
-                        self.worksheet.update_cell(idx + 2, 7, 'Hadir')    # Kolom F: Status Terakhir (teks)
-                        logger.info(f"✅ Updated status for {row['Nama']}: Hadir")
-                    
-                    logger.info(f"✅ Updated record for {row['Nama']}: {status}")
-                    return True
+            # Cari baris berdasarkan Telegram ID (lewat index, tanpa scan DataFrame)
+            row_number, row = self.find_student(telegram_id)
+            if row_number is None:
+                logger.warning(f"❌ Telegram ID {telegram_id} tidak ditemukan")
+                return None
+
+            # Konversi nilai saat ini ke integer (pastikan angka)
+            current_hadir = parse_int(row.get('Total Hadir'))
+            current_alpha = parse_int(row.get('Total Alpha'))
+            current_izin = parse_int(row.get('Total Izin'))
+            current_status = row.get('Status Terakhir', '')
+
+            new_alpha = current_alpha
+            new_izin = current_izin
+
+            # Update total alpha atau izin berdasarkan status
+            if status == 'Alpha':
+                # Update Total Alpha (angka) dan Status Terakhir (teks) dalam satu request
+                new_alpha = current_alpha + 1
+                changes = {'Total Alpha': new_alpha, 'Status Terakhir': 'Alpha'}
+
+            elif status == 'Izin':
+                # Update Total Izin (angka) dan Status Terakhir (teks) dalam satu request
+                new_izin = current_izin + 1
+                changes = {'Total Izin': new_izin, 'Status Terakhir': 'Izin'}
+
+            # Untuk status 'Hadir', hanya update status terakhir saja
+            elif status == 'Hadir':
+                # Hanya update Status Terakhir (teks), angka tetap
+                changes = {'Status Terakhir': 'Hadir'}
+
+            else:
+                logger.warning(f"❌ Status tidak dikenal: {status}")
+                return None
+
+            # Simpan ke store lokal (durable) + riwayat sesi hari ini; spreadsheet
+            # diperbarui oleh sync di background
+            session_date = datetime.now(WIB).strftime('%Y-%m-%d')
+            self._record_changes(telegram_id, status, changes, session_date)
             
-            logger.warning(f"❌ Telegram ID {telegram_id} tidak ditemukan")
-            return False
+            logger.info(f"✅ Updated record for {row['Nama']}: {status} {changes}")
+            return AttendanceResult(
+                telegram_id=self._normalize_id(telegram_id),
+                nama=row['Nama'],
+                status=status,
+                hadir_before=current_hadir,
+                hadir_after=current_hadir,
+                alpha_before=current_alpha,
+                alpha_after=new_alpha,
+                izin_before=current_izin,
+                izin_after=new_izin,
+                status_before=current_status,
+                status_after=changes['Status Terakhir'],
+            )
             
         except Exception as e:
             logger.error(f"Error updating student record: {e}")
+            return None
+
+    def _get_column_number(self, column):
+        """Nomor kolom (1-based) dari nama header spreadsheet (header dibaca sekali)"""
+        if self._header is None:
+            self._header = self.worksheet.row_values(1)
+        return self._header.index(column) + 1
+
+    def _record_changes(self, telegram_id, status, changes, session_date=None):
+        """Tulis perubahan ke store lokal + outbox, lalu samakan salinan di memori.
+
+        Untuk perubahan yang bergantung pada nilai lama (counter), pemanggil harus
+        memegang _student_lock(telegram_id).
+        """
+        with self._roster_lock:
+            self.store.append(self._normalize_id(telegram_id), status, changes, session_date)
+            self._patch_cached_student(telegram_id, changes)
+
+    @staticmethod
+    def _first_appended_row(response):
+        """Nomor baris pertama hasil append_rows dari updatedRange ('Sheet1!A12:I15')"""
+        updated_range = (response or {}).get('updates', {}).get('updatedRange', '')
+        match = re.search(r'![A-Z]+(\d+)', updated_range)
+        return int(match.group(1)) if match else None
+
+    def _drop_written_registrations(self, queued):
+        """Buang pendaftaran yang Telegram ID-nya sudah ada di spreadsheet (satu baca kolom ID)"""
+        header = self._header or self.store.get_meta('header') or []
+        id_index = header.index('Telegram ID')
+        in_sheet = {self._normalize_id(value) for value in self._read_columns(['Telegram ID'])['Telegram ID']}
+        written = [seq for seq, _, row_values in queued if self._normalize_id(row_values[id_index]) in in_sheet]
+        if written:
+            self.store.drop_registrations(written)
+            logger.warning(f"⚠️ {len(written)} pendaftaran ternyata sudah tertulis di spreadsheet, tidak di-append ulang")
+        self.store.set_meta('registrations_unconfirmed', False)
+
+    def flush_registrations(self):
+        """Tulis semua pendaftaran yang diantrikan ke spreadsheet dengan satu append_rows.
+
+        Jika append sebelumnya gagal dengan error selain 429, baris bisa saja sudah
+        tertulis; kolom Telegram ID dicek dulu agar pendaftaran tidak di-append dua kali.
+        """
+        with self._flush_lock:
+            queued = self.store.pending_registrations()
+            if not queued:
+                return True
+            try:
+                if self.worksheet is None:
+                    self.setup_sheets()
+                if self.store.get_meta('registrations_unconfirmed'):
+                    self._drop_written_registrations(queued)
+                    queued = self.store.pending_registrations()
+                    if not queued:
+                        return True
+                response = self.worksheet.append_rows([row_values for _, _, row_values in queued])
+            except Exception as e:
+                if may_have_been_written(e):
+                    self.store.set_meta('registrations_unconfirmed', True)
+                logger.error(f"Error appending registrations: {e}")
+                return False
+            self.store.mark_registrations_flushed(queued[-1][0])
+            logger.info(f"📝 {len(queued)} pendaftaran ditulis ke spreadsheet")
+
+            first_row = self._first_appended_row(response)
+            if first_row is not None and first_row != queued[0][1]:
+                # Ada baris yang ditambahkan manual di spreadsheet: nomor baris lokal tidak
+                # lagi cocok, baca ulang sebelum ada absensi yang ditulis ke baris salah
+                logger.warning(f"⚠️ Pendaftaran masuk di baris {first_row}, bukan {queued[0][1]}; membaca ulang spreadsheet")
+                self.pull_from_sheet(force=True)
+            return True
+
+    def flush_journal(self):
+        """Push pendaftaran baru lalu semua perubahan di outbox ke spreadsheet"""
+        with self._flush_lock:
+            # Baris murid baru harus ada di spreadsheet sebelum absensinya ditulis
+            if not self.flush_registrations():
+                return False
+            last_seq, updates = self.store.pending_entries()
+            if not updates:
+                return True
+            pushed = self._write_updates(updates)
+            if pushed is None:
+                logger.warning(f"⚠️ Push ke spreadsheet gagal, {len(updates)} murid akan dicoba lagi")
+                return False
+            # Record lokal disamakan dengan nilai yang baru ditulis (+ absensi yang masuk selama push);
+            # store & cache diubah di bawah _roster_lock agar absensi baru tidak terselip di antaranya
+            with self._roster_lock:
+                settled = self.store.mark_flushed(last_seq, pushed)
+                for telegram_id, record in settled.items():
+                    self._patch_cached_student(telegram_id, {column: record.get(column) for column in pushed[telegram_id]})
+            logger.info(f"📤 Outbox di-push ke spreadsheet: {len(pushed)} murid")
+            return True
+
+    def apply_updates(self, updates):
+        """Simpan banyak perubahan sekaligus lalu langsung coba push ke spreadsheet.
+
+        updates: list of (telegram_id, {nama_kolom: nilai}).
+        Return True jika perubahan tersimpan di store lokal; jika spreadsheet sedang
+        tidak bisa diakses, push diulang oleh sync berikutnya.
+        """
+        try:
+            recorded = 0
+            for telegram_id, changes in updates:
+                if self.find_student(telegram_id)[0] is None:
+                    logger.warning(f"❌ Telegram ID {telegram_id} tidak ditemukan, dilewati")
+                    continue
+                self._record_changes(telegram_id, None, changes)
+                recorded += 1
+            if not recorded:
+                return False
+        except Exception as e:
+            logger.error(f"Error applying batch updates: {e}")
             return False
+        self.flush_journal()
+        return True
+
+    def _read_columns(self, columns):
+        """Isi beberapa kolom mulai baris 2 dengan satu batch_get: {kolom: [nilai, ...]} (index 0 = baris 2)"""
+        from gspread.utils import rowcol_to_a1
+        ranges = []
+        for column in columns:
+            start = rowcol_to_a1(2, self._get_column_number(column))
+            ranges.append(f"{start}:{start.rstrip('0123456789')}")
+        value_ranges = self.worksheet.batch_get(ranges)
+        return {column: [row[0] if row else '' for row in values] for column, values in zip(columns, value_ranges)}
+
+    def _build_updates(self, updates, sheet):
+        """Susun data batch_update dari outbox dan isi kolom sheet yang baru dibaca.
+
+        Return (data, pushed, mismatched, unknown): murid yang baris lokalnya tidak lagi
+        berisi Telegram ID-nya masuk `mismatched` dan tidak ditulis; murid yang sudah
+        tidak ada di roster (barisnya dihapus admin) masuk `unknown`. Counter absensi
+        dihitung dari nilai di sheet, jadi edit manual admin pada counter tidak tertimpa.
+        """
+        from gspread.utils import rowcol_to_a1
+        data, pushed, mismatched, unknown = [], {}, [], []
+        sheet_ids = sheet['Telegram ID']
+        for telegram_id, entries in updates:
+            row_number, _ = self.find_student(telegram_id)
+            if row_number is None:
+                unknown.append(telegram_id)
+                continue
+            index = row_number - 2
+            if index >= len(sheet_ids) or self._normalize_id(sheet_ids[index]) != telegram_id:
+                mismatched.append(telegram_id)
+                continue
+            current = {column: values[index] if index < len(values) else '' for column, values in sheet.items()}
+            values = apply_pending(current, entries)
+            columns = dict.fromkeys(column for _, changes in entries for column in changes)
+            for column in columns:
+                data.append({
+                    'range': rowcol_to_a1(row_number, self._get_column_number(column)),
+                    'values': [[values[column]]],
+                })
+            pushed[telegram_id] = {column: values[column] for column in columns}
+        return data, pushed, mismatched, unknown
+
+    def _write_updates(self, updates):
+        """Kirim outbox ke spreadsheet lewat satu batch_update.
+
+        Sebelum menulis, kolom Telegram ID (dan counter yang berubah) dibaca sekali
+        untuk memastikan setiap baris tujuan masih milik murid yang sama. Jika ada
+        baris yang bergeser (admin menyisipkan/menghapus baris), roster di-pull ulang
+        dan baris dicocokkan lagi; baris yang tetap tidak cocok tidak pernah ditulis.
+        Return {telegram_id: {kolom: nilai}} yang ditulis ({} jika tidak ada yang perlu
+        ditulis), None jika push gagal. Perubahan untuk murid yang sudah tidak ada di
+        roster tidak ditulis dan ikut dihapus dari outbox oleh mark_flushed().
+        """
+        try:
+            if self.worksheet is None:
+                self.setup_sheets()
+            counters = sorted({
+                COUNTER_COLUMNS[status] for _, entries in updates for status, changes in entries
+                if COUNTER_COLUMNS.get(status) in changes
+            })
+            for attempt in range(2):
+                data, pushed, mismatched, unknown = self._build_updates(
+                    updates, self._read_columns(['Telegram ID', *counters])
+                )
+                if not mismatched:
+                    break
+                if attempt == 0:
+                    logger.warning(f"⚠️ Baris {len(mismatched)} murid di spreadsheet bergeser, membaca ulang sebelum push")
+                    if not self.pull_from_sheet(force=True):
+                        return None
+            else:
+                logger.error(f"❌ Baris murid {mismatched} tetap tidak cocok dengan spreadsheet, push ditunda")
+                return None
+
+            if unknown:
+                logger.warning(f"⚠️ {len(unknown)} Telegram ID tidak ada lagi di roster, perubahannya dibuang: {unknown}")
+            if not data:
+                return {}
+
+            self.worksheet.batch_update(data, value_input_option='USER_ENTERED')
+
+            logger.info(f"✅ Batch update: {len(data)} sel untuk {len(pushed)} murid")
+            return pushed
+
+        except Exception as e:
+            logger.error(f"Error applying batch updates: {e}")
+            return None
 
     def check_auto_kick_conditions(self):
-        """Memeriksa kondisi untuk mengeluarkan murid secara otomatis"""
+        """Memeriksa kondisi untuk mengeluarkan murid secara otomatis.
+
+        Aturan dievaluasi sekaligus untuk semua murid (mask pandas/NumPy), dan setiap
+        murid paling banyak muncul sekali di daftar kick maupun daftar peringatan.
+        """
+        # pandas/NumPy baru dimuat saat pengecekan pertama, bukan saat bot start
+        import numpy as np
+        import pandas as pd
+
         try:
-            df = self.get_student_data()
-            students_to_kick = []
-            students_to_warn = []
-            
-            for _, student in df.iterrows():
-                telegram_id = student['Telegram ID']
-                total_alpha = int(student['Total Alpha']) if pd.notna(student['Total Alpha']) else 0
-                total_izin = int(student['Total Izin']) if pd.notna(student['Total Izin']) else 0
-                nama = student['Nama']
-                
-                # Kick: Alpha dan Izin 3 kali
-                if total_alpha >= 3 or total_izin >= 3:
-                    students_to_kick.append({
-                        'telegram_id': telegram_id,
-                        'nama': nama,
-                        'alasan': f" Sudah Alpha {total_alpha} kali"
-                    })
-
-                if total_alpha >= 2 and total_izin >= 2:
-                    students_to_kick.append({
-                        'telegram_id': telegram_id,
-                        'nama': nama,
-                        'alasan': f"Sudah Alpha {total_alpha} kali dan Izin {total_izin} kali "
-                    })
-                
-                # Peringatan: Izin 2 kali dan Alpha 2 kali
-                if total_izin >= 2 or total_alpha >= 2:
-                    students_to_warn.append({
-                        'telegram_id': telegram_id,
-                        'nama': nama,
-                        'total_izin': total_izin,
-                        'total_alpha': total_alpha
-                    })
+            df = self.get_student_columns(['Telegram ID', 'Nama', 'Total Alpha', 'Total Izin'])
+            if df.empty:
+                return [], []
+
+            # Satu baris per Telegram ID (baris pertama dipakai, sama seperti index)
+            df = df.drop_duplicates(subset='Telegram ID', keep='first')
+            students = pd.DataFrame({
+                'telegram_id': df['Telegram ID'],
+                'nama': df['Nama'],
+                'total_izin': df['Total Izin'].fillna(0).astype(int),
+                'total_alpha': df['Total Alpha'].fillna(0).astype(int),
+            })
+            alpha = students['total_alpha']
+            izin = students['total_izin']
+
+            # Kick: Alpha atau Izin 3 kali, atau Alpha dan Izin sama-sama 2 kali
+            kick_combined = (alpha >= 2) & (izin >= 2)
+            kick_alpha = alpha >= 3
+            kick_izin = izin >= 3
+            kick_mask = kick_combined | kick_alpha | kick_izin
+
+            # Peringatan: Izin 2 kali atau Alpha 2 kali
+            warn_mask = (izin >= 2) | (alpha >= 2)
+
+            # Alasan hanya dibentuk untuk murid yang memang dikeluarkan
+            kicked = students.loc[kick_mask, ['telegram_id', 'nama']]
+            kicked_alpha = alpha[kick_mask].astype(str)
+            kicked_izin = izin[kick_mask].astype(str)
+            alasan = np.select(
+                [kick_combined[kick_mask], kick_alpha[kick_mask], kick_izin[kick_mask]],
+                [
+                    'Sudah Alpha ' + kicked_alpha + ' kali dan Izin ' + kicked_izin + ' kali',
+                    'Sudah Alpha ' + kicked_alpha + ' kali',
+                    'Sudah Izin ' + kicked_izin + ' kali',
+                ],
+                default='',
+            )
+            kick_df = kicked.assign(alasan=alasan)
+            warn_df = students.loc[warn_mask, ['telegram_id', 'nama', 'total_izin', 'total_alpha']]
+
+            # Tetap list of dict agar pemanggil (auto_functions, /list_warnings) tidak berubah
+            students_to_kick = kick_df.to_dict('records')
+            students_to_warn = warn_df.to_dict('records')
 
             logger.info(f"🔍 Auto-kick check: {len(students_to_kick)} akan dikick, {len(students_to_warn)} peringatan")
             return students_to_kick, students_to_warn
@@ -179,31 +729,60 @@ class AttendanceBot:
     def reset_daily_attendance(self):
         """Reset status kehadiran harian"""
         try:
-            df = self.get_student_data()
-            for idx, row in df.iterrows():
-                self.worksheet.update_cell(idx + 2, 7, 'Belum Absen')  # Reset status terakhir (kolom 7)
+            telegram_ids = list(self.get_roster().by_id.keys())
+            # Semua baris direset lewat satu batch_update, bukan satu request per murid
+            self.apply_updates([(telegram_id, {'Status Terakhir': 'Belum Absen'}) for telegram_id in telegram_ids])
             logger.info("Status kehadiran harian direset")
         except Exception as e:
             logger.error(f"Error resetting attendance: {e}")
 
+    def register_student(self, new_row):
+        """Daftarkan murid baru ke store lokal & index, baris spreadsheet diantrikan.
+
+        Baris ditulis ke spreadsheet lewat append_rows oleh sync berikutnya, atau
+        langsung jika antrian sudah mencapai REGISTRATION_BATCH_SIZE.
+        Return False jika Telegram ID sudah terdaftar.
+        """
+        roster = self.get_roster()
+        with self._roster_lock:
+            header = self._header or self.store.get_meta('header') or []
+            record = dict(zip(header, new_row))
+            # Cek ulang di dalam lock: /register ganda dari user yang sama tidak boleh lolos
+            if roster.find(self._normalize_id(record.get('Telegram ID'))) is not None:
+                return False
+            row_number = self.store.queue_registration(record, new_row)
+            if self._roster is not None:
+                self._roster.add(Student(row_number, record))
+
+        if self.store.registration_count() >= REGISTRATION_BATCH_SIZE:
+            self.flush_registrations()
+        return True
+
+    def mark_student_kicked(self, telegram_id, reason):
+        """Catat murid yang dikeluarkan manual di spreadsheet"""
+        return self.apply_updates([(telegram_id, {'Status Terakhir': f"Dikeluarkan: {reason} - Manual"})])
+
     def get_student_emails(self):
         """Ambil daftar email siswa dari spreadsheet"""
-        df = self.get_student_data()
-        # Filter hanya siswa yang memiliki email
-        students_with_email = df[df['Email'].notna() & (df['Email'] != '')]
-        return students_with_email['Email'].tolist()
+        # Hanya siswa yang memiliki email
+        return [student.email for student in self.get_roster() if student.email]
 
     def initialize_classroom_service(self):
         """Inisialisasi Google Classroom service"""
         try:
             if not hasattr(self, 'classroom_service') or self.classroom_service is None:
-                creds = self.get_credentials()
-                if creds:
-                    self.classroom_service = build('classroom', 'v1', credentials=creds)
+                self.classroom_service = google_clients.get_service('classroom', 'v1')
             return self.classroom_service
         except Exception as e:
             logger.error(f"Error initializing Classroom service: {e}")
             return None
+
+    def get_classroom_snapshot(self, course_id, force=False):
+        """Snapshot Classroom course (tugas, roster, submission), None jika service tidak tersedia"""
+        classroom_service = self.initialize_classroom_service()
+        if not classroom_service:
+            return None
+        return classroom_snapshots.get(classroom_service, course_id, force)
     
     def get_students_without_submission(self, course_id, coursework_id):
         """Dapatkan siswa yang belum mengumpulkan tugas berdasarkan email di spreadsheet"""
@@ -214,27 +793,11 @@ class AttendanceBot:
             if not student_emails:
                 return [], "Tidak ada email siswa yang terdaftar di spreadsheet"
         
-            # Inisialisasi classroom service
-            classroom_service = self.initialize_classroom_service()
-            if not classroom_service:
+            # Submission TURNED_IN/RETURNED dari snapshot Classroom bersama
+            snapshot = self.get_classroom_snapshot(course_id)
+            if snapshot is None:
                 return [], "Gagal menginisialisasi Classroom service"
-        
-            # Dapatkan submission dari Classroom - PERBAIKAN: gunakan classroom_service yang sudah didefinisikan
-            submissions_result = classroom_service.courses().courseWork().studentSubmissions().list(
-                courseId=course_id,
-                courseWorkId=coursework_id
-            ).execute()
-        
-            submitted_emails = []
-            if submissions_result.get('studentSubmissions'):
-                for submission in submissions_result['studentSubmissions']:
-                    # Dapatkan email student dari submission
-                    student_profile = classroom_service.userProfiles().get(
-                        userId=submission['userId']
-                    ).execute()
-                    student_email = student_profile.get('emailAddress', '')
-                    if student_email:
-                        submitted_emails.append(student_email.lower())
+            submitted_emails = snapshot.submitted_emails(coursework_id)
         
             # Cari siswa yang terdaftar tapi belum submit
             students_without_submission = []
@@ -249,6 +812,55 @@ class AttendanceBot:
             return [], f"Error: {str(e)}"
 
 
+_shared_bots = {}  # {chat_id cohort: AttendanceBot}
+_shared_bot_lock = Lock()
+
+def get_attendance_bot(cohort=None):
+    """Instance AttendanceBot bersama per cohort (dibuat sekali saat pertama dipakai).
+
+    Tanpa argumen: cohort default. Credentials, client gspread/Classroom, executor
+    dan kuota Sheets dipakai bersama oleh semua cohort.
+    """
+    cohort = cohort or cohort_registry.default
+    bot = _shared_bots.get(cohort.chat_id)
+    if bot is None:
+        with _shared_bot_lock:
+            bot = _shared_bots.get(cohort.chat_id)
+            if bot is None:
+                bot = _shared_bots[cohort.chat_id] = AttendanceBot(cohort)
+    return bot
+
+async def get_async_attendance_bot(cohort=None):
+    """AttendanceBot bersama versi async: method Google berjalan di executor Google I/O,
+    method lokal (LOCAL_METHODS) di executor lokal"""
+    cohort = cohort or cohort_registry.default
+    bot = _shared_bots.get(cohort.chat_id)
+    if bot is None:
+        # Hanya pembuatan pertama yang menghubungi Google (setup_sheets)
+        bot = await run_google_io(get_attendance_bot, cohort)
+    return AsyncGoogleProxy(bot)
+
+def resolve_cohort(chat_id, user_id=None):
+    """Cohort untuk sebuah update: grup cohort -> cohort itu; chat pribadi -> cohort tempat
+    user terdaftar (dicari di roster lokal setiap cohort); selain itu cohort default"""
+    cohort = cohort_registry.get(chat_id)
+    if cohort is not None:
+        return cohort
+    if user_id is not None and len(cohort_registry) > 1:
+        for candidate in cohort_registry:
+            _, student = get_attendance_bot(candidate).find_student(user_id)
+            if student is not None:
+                return candidate
+    return cohort_registry.default
+
+async def get_async_attendance_bot_for(update):
+    """AttendanceBot (async) untuk cohort asal update Telegram"""
+    chat_id = update.effective_chat.id if update.effective_chat else None
+    user_id = update.effective_user.id if update.effective_user else None
+    cohort = await run_local_io(resolve_cohort, chat_id, user_id)
+    return await get_async_attendance_bot(cohort)
+
+
 class ClassroomAutoReminder:
     def __init__(self, bot_instance):
         self.bot = bot_instance
@@ -258,29 +870,12 @@ class ClassroomAutoReminder:
     def get_all_coursework(self, course_id):
         """Ambil semua tugas dari course tertentu"""
         try:
-            classroom_service = self.bot.initialize_classroom_service()
-            if not classroom_service:
+            snapshot = self.bot.get_classroom_snapshot(course_id)
+            if snapshot is None:
                 return []
-                
-            coursework = classroom_service.courses().courseWork().list(
-                courseId=course_id
-            ).execute()
-            
-            active_assignments = []
-            if coursework.get('courseWork'):
-                for assignment in coursework['courseWork']:
-                    # Cek apakah tugas masih aktif (belum lewat due date)
-                    if assignment.get('dueDate'):
-                        due_date = datetime(
-                            assignment['dueDate']['year'],
-                            assignment['dueDate']['month'], 
-                            assignment['dueDate']['day']
-                        )
-                        # Jika due date masih di masa depan atau hari ini
-                        if due_date >= datetime.now().replace(hour=0, minute=0, second=0, microsecond=0):
-                            active_assignments.append(assignment)
             
-            return active_assignments
+            # Tugas yang masih aktif (due date hari ini atau nanti)
+            return snapshot.active_coursework()
         except Exception as e:
             logger.error(f"Error getting coursework: {e}")
             return []
@@ -293,26 +888,11 @@ class ClassroomAutoReminder:
             if not student_emails:
                 return [], "Tidak ada email siswa terdaftar"
             
-            # Dapatkan submission
-            classroom_service = self.bot.initialize_classroom_service()
-            if not classroom_service:
+            # Submission TURNED_IN/RETURNED dari snapshot Classroom bersama
+            snapshot = self.bot.get_classroom_snapshot(course_id)
+            if snapshot is None:
                 return [], "Gagal menginisialisasi Classroom service"
-                
-            submissions_result = classroom_service.courses().courseWork().studentSubmissions().list(
-                courseId=course_id,
-                courseWorkId=coursework_id
-            ).execute()
-            
-            submitted_emails = []
-            if submissions_result.get('studentSubmissions'):
-                for submission in submissions_result['studentSubmissions']:
-                    if submission['state'] == 'TURNED_IN' or submission['state'] == 'RETURNED':
-                        student_profile = classroom_service.userProfiles().get(
-                            userId=submission['userId']
-                        ).execute()
-                        student_email = student_profile.get('emailAddress', '')
-                        if student_email:
-                            submitted_emails.append(student_email.lower())
+            submitted_emails = snapshot.submitted_emails(coursework_id)
             
             # Siswa yang belum submit
             students_without_submission = []
@@ -330,12 +910,12 @@ class ClassroomAutoReminder:
         """Format pesan reminder yang akan dikirim ke grup"""
         due_date = f"{assignment['dueDate']['day']}/{assignment['dueDate']['month']}/{assignment['dueDate']['year']}"
         
-        # Dapatkan data siswa yang terlambat
-        df = self.bot.get_student_data()
-        late_students_data = df[df['Email'].isin(late_students)]
-        
+        # Dapatkan data siswa yang terlambat (lewat index email)
         student_list = []
-        for _, student in late_students_data.iterrows():
+        for email in late_students:
+            _, student = self.bot.find_student_by_email(email)
+            if student is None:
+                continue
             student_info = f"• {student['Nama']}"
             if student.get('Username') and student['Username'] != '-':
                 student_info += f" (@{student['Username'].replace('@', '')})"
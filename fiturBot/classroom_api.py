@@ -0,0 +1,72 @@
+import logging
+from config import CLASSROOM_BATCH_SIZE, CLASSROOM_PAGE_SIZE
+
+logger = logging.getLogger(__name__)
+
+# Partial response (fields=): hanya kolom yang benar-benar dibaca bot
+COURSEWORK_FIELDS = 'id,title,description,dueDate'
+SUBMISSION_FIELDS = 'courseWorkId,userId,state'
+STUDENT_FIELDS = 'userId,profile(name/fullName,emailAddress)'
+PROFILE_FIELDS = 'emailAddress'
+COURSE_FIELDS = 'id,name'
+
+# State submission yang dihitung sudah mengumpulkan
+SUBMITTED_STATES = ['TURNED_IN', 'RETURNED']
+
+def iter_pages(list_method, items_key, page_size=CLASSROOM_PAGE_SIZE, fields=None, **params):
+    """Generator halaman hasil method list Classroom, mengikuti nextPageToken sampai habis.
+
+    Contoh: iter_pages(service.courses().courseWork().list, 'courseWork', courseId=course_id)
+    Setiap halaman (list item) di-yield begitu diterima, jadi pemanggil bisa mulai
+    memproses sebelum halaman terakhir diambil. fields='id,title' membatasi kolom
+    setiap item (nextPageToken otomatis ikut diminta).
+    """
+    if fields:
+        params['fields'] = f"nextPageToken,{items_key}({fields})"
+    page_token = None
+    while True:
+        response = list_method(pageSize=page_size, pageToken=page_token, **params).execute()
+        yield response.get(items_key, [])
+        page_token = response.get('nextPageToken')
+        if not page_token:
+            return
+
+def iter_items(list_method, items_key, page_size=CLASSROOM_PAGE_SIZE, fields=None, **params):
+    """Seperti iter_pages, tetapi yield item satu per satu"""
+    for page in iter_pages(list_method, items_key, page_size, fields, **params):
+        yield from page
+
+def batch_execute(service, requests, batch_size=CLASSROOM_BATCH_SIZE):
+    """Kirim banyak request googleapiclient lewat batch HTTP, maksimal batch_size per round trip.
+
+    requests: {kunci: HttpRequest}. Return (hasil, gagal) berupa {kunci: response}
+    dan {kunci: Exception}; error satu item tidak menggagalkan item lain.
+    """
+    results = {}
+    errors = {}
+    keys = {str(key): key for key in requests}
+
+    def collect(request_id, response, exception):
+        if exception is not None:
+            errors[keys[request_id]] = exception
+        else:
+            results[keys[request_id]] = response
+
+    pending = list(keys)
+    for start in range(0, len(pending), batch_size):
+        batch = service.new_batch_http_request(callback=collect)
+        for request_id in pending[start:start + batch_size]:
+            batch.add(requests[keys[request_id]], request_id=request_id)
+        batch.execute()
+
+    if errors:
+        logger.warning(f"⚠️ {len(errors)} dari {len(keys)} request batch gagal, contoh: {next(iter(errors.values()))}")
+    return results, errors
+
+def get_user_profiles(service, user_ids, fields=PROFILE_FIELDS):
+    """Profil (userProfiles.get) untuk setiap userId unik via batch: ({userId: profile}, {userId: Exception})"""
+    requests = {
+        user_id: service.userProfiles().get(userId=user_id, fields=fields)
+        for user_id in dict.fromkeys(user_ids)
+    }
+    return batch_execute(service, requests)
@@ -1,23 +1,22 @@
-import os
+import importlib.util
 import logging
-from google.oauth2.service_account import Credentials
-from googleapiclient.discovery import build
-from config import SCOPES, CREDENTIALS_FILE, CLASSROOM_COURSE_ID
+from datetime import date, timedelta
+from config import CLASSROOM_COURSE_ID
+from .classroom_snapshot import classroom_snapshots, due_date_of
+from .google_clients import google_clients
 
 logger = logging.getLogger(__name__)
 
-try:
-    from googleapiclient.discovery import build
-    from google.auth.transport.requests import Request
-    GOOGLE_CLASSROOM_AVAILABLE = True
-except ImportError:
-    GOOGLE_CLASSROOM_AVAILABLE = False
+# Cek ketersediaan tanpa meng-import googleapiclient (di-import saat service dibuat)
+GOOGLE_CLASSROOM_AVAILABLE = importlib.util.find_spec('googleapiclient') is not None
+if not GOOGLE_CLASSROOM_AVAILABLE:
     print("⚠️  Google Classroom API tidak tersedia. Fitur reminder tugas akan dinonaktifkan.")
 
 class ClassroomManager:
-    def __init__(self):
+    def __init__(self, course_id=CLASSROOM_COURSE_ID):
         if not GOOGLE_CLASSROOM_AVAILABLE:
             raise ImportError("Google Classroom API tidak terinstall")
+        self.course_id = course_id
         self.service = None
         self.setup_classroom()
     
@@ -26,13 +25,8 @@ class ClassroomManager:
         try:
             logger.info("Memulai koneksi ke Google Classroom...")
             
-            # Validasi file credentials
-            if not os.path.exists(CREDENTIALS_FILE):
-                raise FileNotFoundError(f"File {CREDENTIALS_FILE} tidak ditemukan!")
-            
-            # Setup credentials dan koneksi
-            creds = Credentials.from_service_account_file(CREDENTIALS_FILE, scopes=SCOPES)
-            self.service = build('classroom', 'v1', credentials=creds)
+            # Service diambil dari registry bersama (discovery hanya dibuild sekali)
+            self.service = google_clients.get_service('classroom', 'v1')
             
             logger.info("✅ Berhasil terhubung ke Google Classroom!")
             
@@ -40,53 +34,16 @@ class ClassroomManager:
             logger.error(f"❌ Error connecting to Google Classroom: {e}")
             raise
     
+    def get_snapshot(self, force=False):
+        """Snapshot Classroom course ini (dipakai bersama job lain selama CLASSROOM_SNAPSHOT_TTL)"""
+        return classroom_snapshots.get(self.service, self.course_id, force)
+
     def get_unsubmitted_assignments(self):
         """Mendapatkan daftar siswa yang belum mengumpulkan tugas"""
         try:
-            # Dapatkan daftar course work (tugas)
-            course_work = self.service.courses().courseWork().list(
-                courseId=CLASSROOM_COURSE_ID
-            ).execute()
-            logger.info(f"📋 Found {len(course_work.get('courseWork', []))} assignments")
-            
-            unsubmitted_students = {}
-            
-            for work in course_work.get('courseWork', []):
-                work_title = work['title']
-                work_id = work['id']
-
-                logger.info(f"📝 Checking assignment: {work_title}")
-                
-                # Dapatkan submission untuk setiap tugas
-                submissions = self.service.courses().courseWork().studentSubmissions().list(
-                    courseId=CLASSROOM_COURSE_ID,
-                    courseWorkId=work_id
-                ).execute()
-                logger.info(f"   📊 Found {len(submissions.get('studentSubmissions', []))} submissions")
-                
-                # Cek siswa yang belum submit
-                for submission in submissions.get('studentSubmissions', []):
-                    if submission['state'] != 'TURNED_IN':
-                        student_id = submission['userId']
-                        
-                        # Dapatkan info siswa
-                        try:
-                            student = self.service.courses().students().get(
-                            courseId=CLASSROOM_COURSE_ID,
-                            userId=student_id
-                            ).execute()
-                        
-                            student_name = student['profile']['name']['fullName']
-                        
-                            if student_name not in unsubmitted_students:
-                                unsubmitted_students[student_name] = []
-                        
-                            unsubmitted_students[student_name].append(work_title)
-                        
-                        except Exception as e:
-                            logger.error(f"❌ Error getting student info: {e}")
-                            continue
-            
+            snapshot = self.get_snapshot()
+            unsubmitted_students = snapshot.unsubmitted_by_student()
+            logger.info(f"📋 Checked {len(snapshot.coursework)} assignments")
             logger.info(f"🎯 Unsubmitted assignments: {len(unsubmitted_students)} students")
             return unsubmitted_students
             
@@ -94,19 +51,47 @@ class ClassroomManager:
             logger.error(f"Error getting unsubmitted assignments: {e}")
             return {}
 
-    """    
+    def _summarize(self, snapshot, work, status=None):
+        """Ringkasan tugas untuk pesan reminder"""
+        due = due_date_of(work)
+        return {
+            'id': work['id'],
+            'title': work['title'],
+            'description': work.get('description', ''),
+            'due_date': due.strftime('%d/%m/%Y') if due else None,
+            'unsubmitted': len(snapshot.unsubmitted_user_ids(work['id'])),
+            'status': status,
+        }
+
     def get_upcoming_assignments(self, days=3):
-        \"\"\"Mendapatkan tugas yang deadline-nya dalam beberapa hari ke depan\"\"\"
-        # Implementation: return assignments with due date within next 'days' days
-        pass
+        """Mendapatkan tugas yang deadline-nya dalam beberapa hari ke depan"""
+        snapshot = self.get_snapshot()
+        today = date.today()
+        return [
+            self._summarize(snapshot, work, 'upcoming') for work in snapshot.coursework
+            if due_date_of(work) and today <= due_date_of(work) <= today + timedelta(days=days)
+        ]
 
     def get_overdue_assignments(self):
-        \"\"\"Mendapatkan tugas yang sudah melewati deadline\"\"\"
-        # Implementation: return assignments that are past due date
-        pass
+        """Mendapatkan tugas yang sudah melewati deadline dan masih ada siswa yang belum mengumpulkan"""
+        snapshot = self.get_snapshot()
+        today = date.today()
+        return [
+            self._summarize(snapshot, work, 'overdue') for work in snapshot.coursework
+            if due_date_of(work) and due_date_of(work) < today and snapshot.unsubmitted_user_ids(work['id'])
+        ]
 
     def get_all_active_assignments(self):
-        \"\"\"Mendapatkan semua tugas yang masih aktif\"\"\"
-        # Implementation: return all active assignments
-        pass
-    """
\ No newline at end of file
+        """Mendapatkan semua tugas yang masih aktif: overdue, ongoing (deadline minggu ini), upcoming"""
+        snapshot = self.get_snapshot()
+        today = date.today()
+        assignments = []
+        for work in snapshot.coursework:
+            due = due_date_of(work)
+            if due is None or due > today + timedelta(days=7):
+                assignments.append(self._summarize(snapshot, work, 'upcoming'))
+            elif due >= today:
+                assignments.append(self._summarize(snapshot, work, 'ongoing'))
+            elif snapshot.unsubmitted_user_ids(work['id']):
+                assignments.append(self._summarize(snapshot, work, 'overdue'))
+        return assignments
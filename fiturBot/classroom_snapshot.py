@@ -0,0 +1,161 @@
+import json
+import logging
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, asdict
+from datetime import date
+from config import CLASSROOM_SNAPSHOT_TTL, CLASSROOM_SNAPSHOT_DIR
+from .classroom_api import (
+    iter_items, get_user_profiles, COURSEWORK_FIELDS, STUDENT_FIELDS, SUBMISSION_FIELDS, SUBMITTED_STATES
+)
+
+logger = logging.getLogger(__name__)
+
+def due_date_of(work):
+    """dueDate Classroom -> date, None jika tugas tanpa deadline"""
+    due = work.get('dueDate')
+    if not due:
+        return None
+    return date(due['year'], due['month'], due['day'])
+
+@dataclass
+class ClassroomSnapshot:
+    """Keadaan satu course Classroom pada satu waktu: tugas, roster, dan state submission"""
+    course_id: str
+    fetched_at: float
+    coursework: list    # [{'id', 'title', 'description', 'dueDate'}]
+    students: dict      # {userId: {'name': fullName, 'email': emailAddress}}
+    submissions: dict   # {courseWorkId: {userId: state}}
+
+    def age(self):
+        """Detik sejak snapshot diambil"""
+        return time.time() - self.fetched_at
+
+    def get_coursework(self, coursework_id):
+        for work in self.coursework:
+            if work['id'] == coursework_id:
+                return work
+        return None
+
+    def active_coursework(self, today=None):
+        """Tugas dengan deadline hari ini atau nanti"""
+        today = today or date.today()
+        return [work for work in self.coursework if due_date_of(work) and due_date_of(work) >= today]
+
+    def submitted_emails(self, coursework_id):
+        """Email (lowercase) siswa yang submission-nya TURNED_IN/RETURNED"""
+        emails = set()
+        for user_id, state in self.submissions.get(coursework_id, {}).items():
+            email = self.students.get(user_id, {}).get('email')
+            if state in SUBMITTED_STATES and email:
+                emails.add(email.lower())
+        return emails
+
+    def unsubmitted_user_ids(self, coursework_id):
+        return [user_id for user_id, state in self.submissions.get(coursework_id, {}).items() if state != 'TURNED_IN']
+
+    def unsubmitted_by_student(self):
+        """{nama_siswa: [judul tugas]} untuk submission yang belum TURNED_IN"""
+        unsubmitted_students = {}
+        for work in self.coursework:
+            for user_id in self.unsubmitted_user_ids(work['id']):
+                name = self.students.get(user_id, {}).get('name')
+                if name:
+                    unsubmitted_students.setdefault(name, []).append(work['title'])
+        return unsubmitted_students
+
+def fetch_snapshot(service, course_id):
+    """Ambil snapshot baru: tugas, roster, dan submission semua tugas (courseWorkId='-')"""
+    started = time.perf_counter()
+    coursework = list(iter_items(
+        service.courses().courseWork().list, 'courseWork',
+        fields=COURSEWORK_FIELDS, courseId=course_id
+    ))
+    students = {}
+    for student in iter_items(service.courses().students().list, 'students',
+                              fields=STUDENT_FIELDS, courseId=course_id):
+        profile = student.get('profile', {})
+        students[student['userId']] = {
+            'name': profile.get('name', {}).get('fullName'),
+            'email': profile.get('emailAddress'),
+        }
+
+    # Submission semua tugas dalam satu listing, bukan satu list per tugas
+    submissions = {}
+    for submission in iter_items(service.courses().courseWork().studentSubmissions().list, 'studentSubmissions',
+                                 fields=SUBMISSION_FIELDS, courseId=course_id, courseWorkId='-'):
+        submissions.setdefault(submission['courseWorkId'], {})[submission['userId']] = submission['state']
+
+    # Siswa yang sudah keluar course tidak ada di roster, profilnya diambil per batch
+    missing = {user_id for states in submissions.values() for user_id in states} - set(students)
+    if missing:
+        profiles, _ = get_user_profiles(service, missing, fields='name/fullName,emailAddress')
+        for user_id, profile in profiles.items():
+            students[user_id] = {'name': profile.get('name', {}).get('fullName'), 'email': profile.get('emailAddress')}
+
+    snapshot = ClassroomSnapshot(course_id, time.time(), coursework, students, submissions)
+    logger.info(
+        f"📸 Snapshot Classroom {course_id}: {len(coursework)} tugas, {len(students)} siswa, "
+        f"{sum(len(states) for states in submissions.values())} submission ({time.perf_counter() - started:.1f} s)"
+    )
+    return snapshot
+
+class ClassroomSnapshotCache:
+    """Cache snapshot Classroom per course di memori dan di disk, berlaku selama ttl detik.
+
+    Job & command yang berjalan berdekatan memakai snapshot yang sama; pengambilan
+    untuk course yang sama tidak pernah berjalan bersamaan (lock per course).
+    """
+
+    def __init__(self, ttl=CLASSROOM_SNAPSHOT_TTL, directory=CLASSROOM_SNAPSHOT_DIR):
+        self.ttl = ttl
+        self.directory = directory
+        self._snapshots = {}     # {course_id: ClassroomSnapshot}
+        self._course_locks = {}  # {course_id: Lock}
+        self._lock = threading.Lock()
+
+    def _course_lock(self, course_id):
+        with self._lock:
+            return self._course_locks.setdefault(course_id, threading.Lock())
+
+    def _path(self, course_id):
+        return os.path.join(self.directory, f"classroom_{re.sub(r'[^A-Za-z0-9_-]', '_', str(course_id))}.json")
+
+    def _load(self, course_id):
+        path = self._path(course_id)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return ClassroomSnapshot(**json.load(f))
+        except Exception as e:
+            logger.warning(f"⚠️ Snapshot Classroom di disk tidak bisa dibaca ({path}): {e}")
+            return None
+
+    def _save(self, snapshot):
+        path = self._path(snapshot.course_id)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(path + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump(asdict(snapshot), f, ensure_ascii=False)
+            os.replace(path + '.tmp', path)
+        except Exception as e:
+            logger.warning(f"⚠️ Gagal menyimpan snapshot Classroom ke disk: {e}")
+
+    def get(self, service, course_id, force=False):
+        """Snapshot course yang masih berlaku (memori, lalu disk), atau ambil baru dari Classroom"""
+        with self._course_lock(course_id):
+            if not force:
+                snapshot = self._snapshots.get(course_id) or self._load(course_id)
+                if snapshot is not None and snapshot.age() < self.ttl:
+                    self._snapshots[course_id] = snapshot
+                    return snapshot
+            snapshot = fetch_snapshot(service, course_id)
+            self._snapshots[course_id] = snapshot
+            self._save(snapshot)
+            return snapshot
+
+# Instance global
+classroom_snapshots = ClassroomSnapshotCache()
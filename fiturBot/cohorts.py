@@ -0,0 +1,120 @@
+import asyncio
+import functools
+import logging
+from dataclasses import dataclass, fields
+from config import (
+    COHORTS, COHORT_JOB_CONCURRENCY, GROUP_CHAT_ID, SPREADSHEET_URL, WORKSHEET_NAME,
+    ATTENDANCE_HISTORY_WORKSHEET, CLASSROOM_COURSE_ID, GOOGLE_MEET_LINK,
+    ANNOUNCEMENT_TOPIC_ID, ASSIGNMENT_TOPIC_ID, ATTENDANCE_TOPIC_ID, ROSTER_DB_FILE
+)
+
+logger = logging.getLogger(__name__)
+
+INT_FIELDS = ('chat_id', 'announcement_topic_id', 'assignment_topic_id', 'attendance_topic_id')
+
+@dataclass(frozen=True)
+class Cohort:
+    """Satu kelas: grup Telegram, spreadsheet/worksheet, topik grup, dan course Classroom"""
+    name: str
+    chat_id: int
+    spreadsheet_url: str
+    worksheet_name: str = WORKSHEET_NAME
+    history_worksheet_name: str = ATTENDANCE_HISTORY_WORKSHEET
+    classroom_course_id: str = CLASSROOM_COURSE_ID
+    announcement_topic_id: int = ANNOUNCEMENT_TOPIC_ID
+    assignment_topic_id: int = ASSIGNMENT_TOPIC_ID
+    attendance_topic_id: int = ATTENDANCE_TOPIC_ID
+    meet_link: str = GOOGLE_MEET_LINK
+    roster_db_file: str = ROSTER_DB_FILE
+
+    @classmethod
+    def from_dict(cls, item, position):
+        """Cohort dari satu item COHORTS; cohort selain yang pertama mendapat database sendiri"""
+        known = {field.name for field in fields(cls)}
+        unknown = set(item) - known
+        if unknown:
+            logger.warning(f"⚠️ Kolom cohort tidak dikenal diabaikan: {sorted(unknown)}")
+        values = {key: value for key, value in item.items() if key in known}
+        for key in INT_FIELDS:
+            if key in values:
+                values[key] = int(values[key])
+        values.setdefault('name', f"Cohort {position + 1}")
+        if position > 0:
+            values.setdefault('roster_db_file', f"roster_{abs(values['chat_id'])}.db")
+        return cls(**values)
+
+class CohortRegistry:
+    """Peta chat ID grup -> Cohort untuk semua kelas yang dilayani proses ini.
+
+    Cohort pertama adalah default: dipakai untuk chat yang bukan grup cohort
+    (chat pribadi) dan memakai ROSTER_DB_FILE agar data lama tetap terbaca.
+    """
+
+    def __init__(self, cohorts):
+        self.cohorts = []
+        self.by_chat = {}
+        for cohort in cohorts:
+            if cohort.chat_id in self.by_chat:
+                logger.warning(f"⚠️ Chat {cohort.chat_id} sudah dipakai cohort {self.by_chat[cohort.chat_id].name}, '{cohort.name}' dilewati")
+                continue
+            self.cohorts.append(cohort)
+            self.by_chat[cohort.chat_id] = cohort
+
+    @classmethod
+    def from_config(cls):
+        if COHORTS:
+            return cls(Cohort.from_dict(item, position) for position, item in enumerate(COHORTS))
+        return cls([Cohort(name='Default', chat_id=GROUP_CHAT_ID, spreadsheet_url=SPREADSHEET_URL)])
+
+    @property
+    def default(self):
+        return self.cohorts[0]
+
+    def __len__(self):
+        return len(self.cohorts)
+
+    def __iter__(self):
+        return iter(self.cohorts)
+
+    def get(self, chat_id):
+        """Cohort milik grup chat_id, None jika chat bukan grup cohort"""
+        return self.by_chat.get(chat_id)
+
+    def for_chat(self, chat_id):
+        """Cohort milik grup chat_id, atau cohort default"""
+        return self.by_chat.get(chat_id, self.default)
+
+    async def fan_out(self, job, *args, concurrency=COHORT_JOB_CONCURRENCY):
+        """Jalankan `await job(*args, cohort=cohort)` untuk setiap cohort, maksimal `concurrency` bersamaan.
+
+        Error di satu cohort dicatat dan tidak menghentikan cohort lain.
+        Return {nama_cohort: hasil atau Exception}.
+        """
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def run(cohort):
+            async with semaphore:
+                try:
+                    return await job(*args, cohort=cohort)
+                except Exception as e:
+                    logger.error(f"❌ {job.__name__} gagal untuk cohort {cohort.name}: {e}")
+                    return e
+
+        results = await asyncio.gather(*(run(cohort) for cohort in self.cohorts))
+        return {cohort.name: result for cohort, result in zip(self.cohorts, results)}
+
+# Instance global
+cohort_registry = CohortRegistry.from_config()
+
+def for_each_cohort(job):
+    """Decorator job terjadwal `job(context, cohort=None)`.
+
+    Dipanggil tanpa cohort (oleh job_queue) -> dijalankan untuk semua cohort lewat
+    fan_out; dengan cohort -> hanya untuk cohort tersebut.
+    """
+    @functools.wraps(job)
+    async def wrapper(context, cohort=None):
+        if cohort is None:
+            return await cohort_registry.fan_out(job, context)
+        return await job(context, cohort=cohort)
+    return wrapper
@@ -0,0 +1,86 @@
+import logging
+import os
+import threading
+from config import SCOPES, get_credentials_file
+
+logger = logging.getLogger(__name__)
+
+class GoogleClientRegistry:
+    """Registry client Google yang dibuat sekali dan dipakai bersama oleh semua handler & job.
+
+    gspread / google-auth / googleapiclient baru di-import saat client pertama dibuat,
+    dan credentials_file=None berarti path diambil dari config saat dibutuhkan.
+    """
+
+    def __init__(self, credentials_file=None, scopes=SCOPES):
+        self.credentials_file = credentials_file
+        self.scopes = scopes
+        self._lock = threading.RLock()
+        self._credentials = None
+        self._gc = None
+        self._worksheets = {}  # {(spreadsheet_url, worksheet_name): Worksheet}
+        self._services = {}    # {(api_name, version): Resource}
+
+    def get_credentials(self):
+        """Credentials service account, di-refresh otomatis jika token sudah kadaluarsa"""
+        with self._lock:
+            if self._credentials is None:
+                from google.oauth2.service_account import Credentials
+                credentials_file = self.credentials_file or get_credentials_file()
+                if not credentials_file or not os.path.exists(credentials_file):
+                    raise FileNotFoundError(f"File {credentials_file} tidak ditemukan!")
+                self._credentials = Credentials.from_service_account_file(
+                    credentials_file, scopes=self.scopes
+                )
+                logger.info("🔑 Credentials Google dimuat")
+
+            if not self._credentials.valid:
+                from google.auth.transport.requests import Request
+                self._credentials.refresh(Request())
+                logger.info("🔄 Token Google di-refresh")
+
+            return self._credentials
+
+    def get_gspread_client(self):
+        """Client gspread bersama"""
+        with self._lock:
+            if self._gc is None:
+                import gspread
+                self._gc = gspread.authorize(self.get_credentials())
+                logger.info("✅ Client Google Sheets dibuat")
+            return self._gc
+
+    def get_worksheet(self, spreadsheet_url, worksheet_name):
+        """Worksheet yang sudah dibuka, di-cache per (spreadsheet, worksheet)"""
+        key = (spreadsheet_url, worksheet_name)
+        with self._lock:
+            worksheet = self._worksheets.get(key)
+            if worksheet is None:
+                worksheet = self.get_gspread_client().open_by_url(spreadsheet_url).worksheet(worksheet_name)
+                self._worksheets[key] = worksheet
+                logger.info(f"✅ Worksheet '{worksheet_name}' dibuka")
+            return worksheet
+
+    def get_service(self, api_name, version):
+        """Service googleapiclient (Classroom, Drive, ...) yang dibuild sekali"""
+        key = (api_name, version)
+        with self._lock:
+            service = self._services.get(key)
+            if service is None:
+                from googleapiclient.discovery import build
+                service = build(api_name, version, credentials=self.get_credentials(), cache_discovery=False)
+                self._services[key] = service
+                logger.info(f"✅ Service {api_name} {version} dibuat")
+            return service
+
+    def reconnect(self):
+        """Buang semua client agar koneksi dibuat ulang pada pemakaian berikutnya"""
+        with self._lock:
+            self._credentials = None
+            self._gc = None
+            self._worksheets.clear()
+            self._services.clear()
+        logger.warning("🔌 Koneksi Google direset, akan dibuat ulang")
+
+# Instance global
+google_clients = GoogleClientRegistry()
@@ -0,0 +1,118 @@
+import asyncio
+import functools
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from config import GOOGLE_IO_WORKERS, LOCAL_IO_WORKERS
+
+logger = logging.getLogger(__name__)
+
+class GoogleExecutor:
+    """Thread pool terbatas khusus untuk panggilan blocking gspread/googleapiclient.
+
+    Handler async menjalankan I/O Google lewat run() sehingga event loop PTB
+    tidak pernah menunggu jaringan. Statistik antrian & latency bisa dilihat
+    lewat get_stats(). Pool kedua (local_executor) dipakai untuk operasi store
+    lokal agar tidak ikut mengantri di belakang backoff retry Sheets.
+    """
+
+    def __init__(self, max_workers=GOOGLE_IO_WORKERS, name='google-io'):
+        self.max_workers = max_workers
+        self.name = name
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._lock = Lock()
+        self._queued = 0
+        self._running = 0
+        self._max_queued = 0
+        self._calls = 0
+        self._errors = 0
+        self._total_latency = 0.0
+        self._max_latency = 0.0
+        self._total_wait = 0.0
+
+    def _execute(self, func, submitted_at, args, kwargs):
+        """Dijalankan di thread pool: catat waktu tunggu, latency, dan error"""
+        started_at = time.monotonic()
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+            self._total_wait += started_at - submitted_at
+        failed = False
+        try:
+            return func(*args, **kwargs)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            latency = time.monotonic() - started_at
+            with self._lock:
+                self._running -= 1
+                self._calls += 1
+                self._errors += int(failed)
+                self._total_latency += latency
+                self._max_latency = max(self._max_latency, latency)
+            if latency > 5:
+                logger.warning(f"🐢 Panggilan lambat di {self.name}: {getattr(func, '__qualname__', func)} {latency:.1f}s")
+
+    async def run(self, func, *args, **kwargs):
+        """Jalankan func(*args, **kwargs) di thread pool dan tunggu hasilnya"""
+        with self._lock:
+            self._queued += 1
+            self._max_queued = max(self._max_queued, self._queued)
+        loop = asyncio.get_running_loop()
+        job = functools.partial(self._execute, func, time.monotonic(), args, kwargs)
+        return await loop.run_in_executor(self._executor, job)
+
+    def get_stats(self):
+        """Statistik executor: kedalaman antrian, jumlah panggilan, dan latency (detik)"""
+        with self._lock:
+            calls = self._calls
+            return {
+                'workers': self.max_workers,
+                'queued': self._queued,
+                'running': self._running,
+                'max_queued': self._max_queued,
+                'calls': calls,
+                'errors': self._errors,
+                'avg_latency': self._total_latency / calls if calls else 0.0,
+                'max_latency': self._max_latency,
+                'avg_wait': self._total_wait / calls if calls else 0.0,
+            }
+
+class AsyncGoogleProxy:
+    """Wrapper async untuk objek sync (AttendanceBot, ClassroomManager, ...).
+
+    Setiap method dipanggil lewat executor Google: `await proxy.get_student_data()`,
+    kecuali method yang terdaftar di `LOCAL_METHODS` milik objek tersebut (hanya
+    menyentuh data lokal) yang dijalankan di executor lokal.
+    Atribut yang bukan method dikembalikan apa adanya; objek aslinya ada di `.wrapped`.
+    """
+
+    def __init__(self, wrapped, executor=None, local=None):
+        self.wrapped = wrapped
+        self._executor = executor or google_executor
+        self._local_executor = local or local_executor
+
+    def __getattr__(self, name):
+        attr = getattr(self.wrapped, name)
+        if not callable(attr):
+            return attr
+        executor = self._local_executor if name in getattr(self.wrapped, 'LOCAL_METHODS', ()) else self._executor
+
+        @functools.wraps(attr)
+        async def wrapper(*args, **kwargs):
+            return await executor.run(attr, *args, **kwargs)
+        return wrapper
+
+# Instance global
+google_executor = GoogleExecutor()
+local_executor = GoogleExecutor(LOCAL_IO_WORKERS, 'local-io')
+
+async def run_google_io(func, *args, **kwargs):
+    """Shortcut: jalankan panggilan blocking Google di executor bersama"""
+    return await google_executor.run(func, *args, **kwargs)
+
+async def run_local_io(func, *args, **kwargs):
+    """Shortcut: jalankan operasi blocking store lokal di executor lokal"""
+    return await local_executor.run(func, *args, **kwargs)
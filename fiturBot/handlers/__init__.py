@@ -1,19 +1,27 @@
+import importlib
 from .user_handlers import start, absen, status, test_connection, get_my_info, register, materi, materi1, materi2, materi3
 from .admin_handlers import (
-    admin_stats, reset_attendance, force_attendance_check, export_data, manual_kick, list_warnings, list_kehadiran, get_all_member_ids, get_simple_member_ids,
+    admin_stats, reset_attendance, force_attendance_check, export_data, manual_kick, refresh_cache, refresh_classroom, google_stats, list_warnings, list_kehadiran, get_all_member_ids, get_simple_member_ids,
     classroom_reminder_now, class_reminder_now, check_topics, admin_help, test_classroom, start_auto_reminder, stop_auto_reminder, test_auto_reminder
 )
-from fiturBot.quiz_handler import (
-    start_command, help_command, quiz, quiz_callback_handler, handle_quiz_message,
-    quiz_help, start_quiz, surrender_quiz, next_question, 
-    show_score, show_points, top_score, quiz_rules, cancel_question,
-    quiz_donate, quiz_report, create_question_start, quiz_stats, add_question_handler
+
+# Handler quiz di-import saat pertama diakses (module quiz memuat database soal saat import)
+QUIZ_HANDLERS = (
+    'start_command', 'help_command', 'quiz', 'quiz_callback_handler', 'handle_quiz_message',
+    'quiz_help', 'start_quiz', 'surrender_quiz', 'next_question',
+    'show_score', 'show_points', 'top_score', 'quiz_rules', 'cancel_question',
+    'quiz_donate', 'quiz_report', 'create_question_start', 'quiz_stats', 'add_question_handler',
 )
 
+def __getattr__(name):
+    if name in QUIZ_HANDLERS:
+        return getattr(importlib.import_module('fiturBot.quiz_handler'), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 __all__ = [
     'start', 'absen', 'status', 'test_connection', 'get_my_info', 'register', 'test_topic',
     'admin_stats', 'admin_help', 'reset_attendance', 'force_attendance_check', 'export_data',
-    'manual_kick', 'list_warnings', 'list_kehadiran', 'classroom_reminder_now', 'class_reminder_now', 'check_topics', 'test_classroom', 'materi', 'materi1', 'materi2', 'materi3', 'start_auto_reminder', 'stop_auto_reminder', 'test_auto_reminder', 'quiz_help',
+    'manual_kick', 'refresh_cache', 'refresh_classroom', 'google_stats', 'list_warnings', 'list_kehadiran', 'classroom_reminder_now', 'class_reminder_now', 'check_topics', 'test_classroom', 'materi', 'materi1', 'materi2', 'materi3', 'start_auto_reminder', 'stop_auto_reminder', 'test_auto_reminder', 'quiz_help',
     'create_question_start', 'get_all_member_ids', 'get_simple_member_ids',
     'quiz', 'start_command', 'help_command',
     'start_quiz', 'quiz_rules', 'quiz_donate',
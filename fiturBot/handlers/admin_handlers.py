@@ -3,11 +3,14 @@ from telegram.ext import ContextTypes
 import logging
 import io
 from datetime import datetime, timedelta
-from ..attendance_bot import AttendanceBot, ClassroomAutoReminder
+from ..attendance_bot import get_async_attendance_bot, get_async_attendance_bot_for, ClassroomAutoReminder
+from ..classroom_api import iter_items, COURSEWORK_FIELDS, COURSE_FIELDS
+from ..cohorts import cohort_registry
+from ..google_executor import AsyncGoogleProxy, run_google_io, google_executor, local_executor
+from ..roster_export import ExportFilter
+from ..sheets_gateway import sheets_quota
 from auto_functions import send_classroom_reminder, send_class_reminder, auto_check_attendance
-from config import ADMIN_IDS, GROUP_CHAT_ID, GOOGLE_MEET_LINK
-from .topic_utils import ANNOUNCEMENT_TOPIC_ID
-import pandas as pd
+from config import ADMIN_IDS, GOOGLE_MEET_LINK
 from datetime import timezone
 
 logger = logging.getLogger(__name__)
@@ -27,29 +30,27 @@ def admin_required(func):
         return await func(update, context, *args, **kwargs)
     return wrapper
 
+def cohort_for(update: Update):
+    """Cohort grup tempat command dikirim (chat pribadi: cohort default)"""
+    return cohort_registry.for_chat(update.effective_chat.id)
+
 @admin_required
 async def admin_stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Lihat statistik lengkap - ADMIN ONLY"""
     try:
-        bot = AttendanceBot()
-        df = bot.get_student_data()
+        bot = await get_async_attendance_bot_for(update)
+        summary = await bot.get_roster_summary()
         
-        if df.empty:
+        if not summary['total_students']:
             await update.message.reply_text("❌ Tidak ada data murid.")
             return
         
-        total_students = len(df)
-        total_alpha = df['Total Alpha'].sum()
-        total_izin = df['Total Izin'].sum()
-        # Hitung murid dalam status warning
-        warning_students = df[(df['Total Izin'] >= 2) | (df['Total Alpha'] >= 2)]
-        
         stats_message = (
             "📊 **STATISTIK ADMIN**\n\n"
-            f"• 👥 Total Murid: {total_students}\n"
-            f"• ❌ Total Alpha: {total_alpha}\n"
-            f"• ⚠️ Total Izin: {total_izin}\n"
-            f"• 🚨 Murid Warning: {len(warning_students)}"
+            f"• 👥 Total Murid: {summary['total_students']}\n"
+            f"• ❌ Total Alpha: {summary['total_alpha']}\n"
+            f"• ⚠️ Total Izin: {summary['total_izin']}\n"
+            f"• 🚨 Murid Warning: {summary['warning_students']}"
         )
         
         await update.message.reply_text(stats_message)
@@ -61,11 +62,11 @@ async def admin_stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def reset_attendance(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Reset data kehadiran - ADMIN ONLY"""
     try:
-        bot = AttendanceBot()
+        bot = await get_async_attendance_bot_for(update)
         
         # Konfirmasi reset
         if context.args and context.args[0] == 'confirm':
-            bot.reset_daily_attendance()
+            await bot.reset_daily_attendance()
             await update.message.reply_text(
                 "✅ **Data kehadiran berhasil direset!**\n"
                 "Semua data alpha/izin telah dikembalikan ke 0."
@@ -88,31 +89,48 @@ async def reset_attendance(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def force_attendance_check(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Paksa pengecekan kehadiran - ADMIN ONLY"""
     try:
-        await auto_check_attendance(context)
+        # Di grup cohort: cohort itu saja; di chat pribadi: semua cohort
+        await auto_check_attendance(context, cohort=cohort_registry.get(update.effective_chat.id))
         await update.message.reply_text("✅ Pengecekan kehadiran dipaksa selesai!")
     except Exception as e:
         await update.message.reply_text(f"❌ Error: {e}")
 
 @admin_required
 async def export_data(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Export data ke CSV - ADMIN ONLY"""
+    """Export data ke CSV (opsional difilter / gzip) - ADMIN ONLY"""
     try:
-        bot = AttendanceBot()
-        df = bot.get_student_data()
-        
-        if df.empty:
-            await update.message.reply_text("❌ Tidak ada data untuk di-export.")
+        try:
+            export_filter = ExportFilter.parse(context.args or [])
+        except ValueError as e:
+            await update.message.reply_text(
+                f"❌ {e}\n\n"
+                "Format: `/export_data [status=alpha] [alpha>=2] [izin>=2] [hadir<=1] "
+                "[dari=2025-01-01] [sampai=2025-01-31] [riwayat] [gzip]`",
+                parse_mode='Markdown'
+            )
             return
-        
-        # Create CSV string
-        csv_data = df.to_csv(index=False)
-        
-        # Send as file
-        await update.message.reply_document(
-            document=io.BytesIO(csv_data.encode()),
-            filename=f"data_kehadiran_{datetime.now().strftime('%Y%m%d')}.csv",
-            caption="📁 Data kehadiran murid"
-        )
+
+        bot = await get_async_attendance_bot_for(update)
+        # CSV ditulis per potongan ke file sementara di thread executor
+        export_file, row_count = await bot.export_csv(export_filter)
+        try:
+            if row_count == 0:
+                await update.message.reply_text("❌ Tidak ada data untuk di-export.")
+                return
+
+            name = 'riwayat_absensi' if export_filter.history else 'data_kehadiran'
+            extension = 'csv.gz' if export_filter.compress else 'csv'
+            caption = f"📁 {'Riwayat absensi' if export_filter.history else 'Data kehadiran murid'} ({row_count} baris)"
+            if export_filter.describe():
+                caption += f"\n🔎 Filter: {export_filter.describe()}"
+
+            await update.message.reply_document(
+                document=export_file,
+                filename=f"{name}_{datetime.now().strftime('%Y%m%d')}.{extension}",
+                caption=caption
+            )
+        finally:
+            export_file.close()
         
     except Exception as e:
         await update.message.reply_text(f"❌ Error: {e}")
@@ -132,19 +150,15 @@ async def manual_kick(update: Update, context: ContextTypes.DEFAULT_TYPE):
         telegram_id = context.args[0]
         reason = ' '.join(context.args[1:]) if len(context.args) > 1 else "Manual kick by admin"
         
-        # Kick dari grup
+        # Kick dari grup cohort
+        bot = await get_async_attendance_bot_for(update)
         await context.bot.ban_chat_member(
-            chat_id=GROUP_CHAT_ID,
+            chat_id=bot.cohort.chat_id,
             user_id=int(telegram_id)
         )
         
         # Update spreadsheet
-        bot = AttendanceBot()
-        df = bot.get_student_data()
-        for idx, row in df.iterrows():
-            if str(row['Telegram ID']) == str(telegram_id):
-                bot.worksheet.update_cell(idx + 2, 6, f"Dikeluarkan: {reason} - Manual")
-                break
+        await bot.mark_student_kicked(telegram_id, reason)
         
         await update.message.reply_text(
             f"✅ **Murid berhasil dikeluarkan!**\n"
@@ -155,12 +169,80 @@ async def manual_kick(update: Update, context: ContextTypes.DEFAULT_TYPE):
     except Exception as e:
         await update.message.reply_text(f"❌ Error: {e}")
 
+@admin_required
+async def refresh_cache(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Baca ulang data murid dari spreadsheet (setelah edit manual) - ADMIN ONLY"""
+    try:
+        bot = await get_async_attendance_bot_for(update)
+        await bot.pull_from_sheet(force=True)
+        roster = await bot.get_roster()
+        
+        await update.message.reply_text(
+            f"✅ **Cache data murid diperbarui!**\n"
+            f"• Total murid: {len(roster)}\n"
+            f"• Absensi belum di-sync: {bot.wrapped.store.pending_count()}"
+        )
+        
+    except Exception as e:
+        await update.message.reply_text(f"❌ Error: {e}")
+
+@admin_required
+async def refresh_classroom(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Ambil ulang snapshot Classroom (tugas, roster, submission) tanpa menunggu TTL - ADMIN ONLY"""
+    try:
+        bot = await get_async_attendance_bot_for(update)
+        course_id = context.args[0] if context.args else bot.cohort.classroom_course_id
+        snapshot = await bot.get_classroom_snapshot(course_id, force=True)
+        
+        if snapshot is None:
+            await update.message.reply_text("❌ Gagal menginisialisasi Google Classroom service")
+            return
+        
+        await update.message.reply_text(
+            f"✅ **Snapshot Classroom diperbarui!**\n"
+            f"• Course: {course_id}\n"
+            f"• Tugas: {len(snapshot.coursework)}\n"
+            f"• Siswa: {len(snapshot.students)}\n"
+            f"• Submission: {sum(len(states) for states in snapshot.submissions.values())}"
+        )
+        
+    except Exception as e:
+        await update.message.reply_text(f"❌ Error: {e}")
+
+@admin_required
+async def google_stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Statistik executor Google I/O (antrian & latency) dan kuota Sheets - ADMIN ONLY"""
+    stats = google_executor.get_stats()
+    local_stats = local_executor.get_stats()
+    message = (
+        "📡 **STATISTIK GOOGLE I/O**\n\n"
+        f"• 🧵 Worker: {stats['workers']} (berjalan: {stats['running']})\n"
+        f"• 📥 Antrian: {stats['queued']} (maks: {stats['max_queued']})\n"
+        f"• 📞 Total panggilan: {stats['calls']} (error: {stats['errors']})\n"
+        f"• ⏱️ Latency rata-rata: {stats['avg_latency'] * 1000:.0f} ms (maks: {stats['max_latency'] * 1000:.0f} ms)\n"
+        f"• ⏳ Tunggu antrian rata-rata: {stats['avg_wait'] * 1000:.0f} ms\n\n"
+        "🗄️ **STORE LOKAL**\n"
+        f"• 🧵 Worker: {local_stats['workers']} (berjalan: {local_stats['running']})\n"
+        f"• 📥 Antrian: {local_stats['queued']} (maks: {local_stats['max_queued']})\n"
+        f"• ⏱️ Latency rata-rata: {local_stats['avg_latency'] * 1000:.0f} ms "
+        f"(tunggu antrian: {local_stats['avg_wait'] * 1000:.0f} ms)\n\n"
+        "📊 **KUOTA GOOGLE SHEETS**\n"
+    )
+    for kind, quota in sheets_quota.get_stats().items():
+        message += (
+            f"• {'📖 Baca' if kind == 'read' else '✏️ Tulis'}: {quota['calls']} request, "
+            f"throttle {quota['throttled']}x ({quota['throttle_wait']:.1f}s), "
+            f"retry {quota['retries']} (429: {quota['rate_limited']}, 5xx: {quota['server_errors']}), "
+            f"gagal {quota['failures']}\n"
+        )
+    await update.message.reply_text(message)
+
 @admin_required
 async def list_warnings(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Lihat daftar murid yang dapat peringatan - ADMIN ONLY"""
     try:
-        bot = AttendanceBot()
-        _, students_to_warn = bot.check_auto_kick_conditions()
+        bot = await get_async_attendance_bot_for(update)
+        _, students_to_warn = await bot.check_auto_kick_conditions()
         
         if not students_to_warn:
             await update.message.reply_text("✅ Tidak ada murid yang perlu diperingatkan.")
@@ -185,10 +267,10 @@ async def list_warnings(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def list_kehadiran(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Kirim laporan kehadiran ke grup - ADMIN ONLY"""
     try:
-        bot = AttendanceBot()
-        df = bot.get_student_data()
+        bot = await get_async_attendance_bot_for(update)
+        roster = await bot.get_roster()
         
-        if df.empty:
+        if not len(roster):
             await update.message.reply_text("❌ Tidak ada data murid.")
             return
 
@@ -203,10 +285,14 @@ async def list_kehadiran(update: Update, context: ContextTypes.DEFAULT_TYPE):
         
         tanggal_str = f"Senin, {senin_minggu_ini.day} {bulan_indonesia[senin_minggu_ini.month]} {senin_minggu_ini.year}"
 
-        # Filter siswa yang hadir (status terakhir = 'Hadir')
-        siswa_hadir = df[df['Status Terakhir'] == 'Hadir']
+        # Murid yang status terakhirnya 'Hadir' pada sesi Senin ini (dari riwayat absensi)
+        kehadiran_sesi = await bot.get_session_attendance(senin_minggu_ini)
+        siswa_hadir = [
+            roster.find(telegram_id) for telegram_id, event in kehadiran_sesi.items()
+            if event['status'] == 'Hadir' and roster.find(telegram_id) is not None
+        ]
         
-        if siswa_hadir.empty:
+        if not siswa_hadir:
             await update.message.reply_text(
                 f"❌ Tidak ada murid yang hadir pada {tanggal_str}"
             )
@@ -235,13 +321,13 @@ async def list_kehadiran(update: Update, context: ContextTypes.DEFAULT_TYPE):
         motivasi = random.choice(motivasi_list)
         pantun = random.choice(pantun_list)
 
-        total_siswa = len(df)
+        total_siswa = len(roster)
         # Format daftar nama siswa yang hadir
         daftar_siswa = []
-        for idx, siswa in siswa_hadir.iterrows():
+        for siswa in siswa_hadir:
             nama = siswa['Nama']
             # Tambahkan username jika ada
-            if 'Username' in siswa and pd.notna(siswa['Username']) and siswa['Username'] != '-':
+            if siswa.get('Username') and siswa['Username'] != '-':
                 username = siswa['Username'].replace('@', '')
                 daftar_siswa.append(f"• {nama} (@{username})")
             else:
@@ -256,7 +342,7 @@ async def list_kehadiran(update: Update, context: ContextTypes.DEFAULT_TYPE):
             f"Terima kasih atas kehadiran teman-teman yang telah hadir di kelas pada {tanggal_str}\n\n"
             f"**📊 DATA KEHADIRAN:**\n"
             f"• Total yang hadir: {len(siswa_hadir)} dari {total_siswa} murid\n"
-            f"• Persentase kehadiran: {(len(siswa_hadir) / len(df) * 100):.1f}%\n\n"
+            f"• Persentase kehadiran: {(len(siswa_hadir) / total_siswa * 100):.1f}%\n\n"
             f"**👥 DAFTAR MURID YANG HADIR:**\n"
             f"{chr(10).join(daftar_siswa)}\n\n"
             f"**💫 KATA MOTIVASI:**\n"
@@ -271,10 +357,10 @@ async def list_kehadiran(update: Update, context: ContextTypes.DEFAULT_TYPE):
         # Kirim ke grup
         try:
             await context.bot.send_message(
-                chat_id=GROUP_CHAT_ID,
+                chat_id=bot.cohort.chat_id,
                 text=message,
                 parse_mode='Markdown',
-                message_thread_id=ANNOUNCEMENT_TOPIC_ID
+                message_thread_id=bot.cohort.announcement_topic_id
             )
             await update.message.reply_text(
                 f"✅ Laporan kehadiran berhasil dikirim ke grup!\n"
@@ -286,7 +372,7 @@ async def list_kehadiran(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
             try:
                 await context.bot.send_message(
-                    chat_id=GROUP_CHAT_ID,
+                    chat_id=bot.cohort.chat_id,
                     text=message,
                     parse_mode='Markdown'
                 )
@@ -325,7 +411,8 @@ def get_wib_time():
 async def class_reminder_now(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Kirim reminder kelas sekarang - ADMIN ONLY"""
     try:
-        await send_class_reminder(context)
+        # Di grup cohort: cohort itu saja; di chat pribadi: semua cohort
+        await send_class_reminder(context, cohort=cohort_registry.get(update.effective_chat.id))
         await update.message.reply_text("✅ Reminder kelas berhasil dikirim!")
     except Exception as e:
         await update.message.reply_text(f"❌ Error: {e}")
@@ -335,15 +422,21 @@ async def class_reminder_now(update: Update, context: ContextTypes.DEFAULT_TYPE)
 async def check_topics(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Cek informasi topik yang tersedia - ADMIN ONLY"""
     try:
-        from config import TOPIC_NAMES, ANNOUNCEMENT_TOPIC_ID, ASSIGNMENT_TOPIC_ID, ATTENDANCE_TOPIC_ID
+        from config import TOPIC_NAMES
+        cohort = cohort_for(update)
+        group_chat_id = cohort.chat_id
+        ANNOUNCEMENT_TOPIC_ID = cohort.announcement_topic_id
+        ASSIGNMENT_TOPIC_ID = cohort.assignment_topic_id
+        ATTENDANCE_TOPIC_ID = cohort.attendance_topic_id
         
         # Cek info grup
-        chat = await context.bot.get_chat(GROUP_CHAT_ID)
+        chat = await context.bot.get_chat(group_chat_id)
         
         topic_info = (
             "📋 **INFORMASI TOPIK GRUP**\n\n"
+            f"• 🎓 Cohort: {cohort.name}\n"
             f"• 💬 Nama Grup: {chat.title}\n"
-            f"• 🆔 Group ID: {GROUP_CHAT_ID}\n"
+            f"• 🆔 Group ID: {group_chat_id}\n"
             f"• 🏷️ Tipe: {chat.type}\n\n"
             f"**Topik yang dikonfigurasi:**\n"
             f"• 🎯 PENGUMUMAN & INFO: Topic ID {ANNOUNCEMENT_TOPIC_ID} ({TOPIC_NAMES.get(ANNOUNCEMENT_TOPIC_ID, 'Unknown')})\n"
@@ -357,7 +450,7 @@ async def check_topics(update: Update, context: ContextTypes.DEFAULT_TYPE):
         # Test announcement topic
         try:
             await context.bot.send_message(
-                chat_id=GROUP_CHAT_ID,
+                chat_id=group_chat_id,
                 message_thread_id=ANNOUNCEMENT_TOPIC_ID,
                 text="🔔 Test pesan ke topik PENGUMUMAN"
             )
@@ -368,7 +461,7 @@ async def check_topics(update: Update, context: ContextTypes.DEFAULT_TYPE):
         # Test assignment topic
         try:
             await context.bot.send_message(
-                chat_id=GROUP_CHAT_ID,
+                chat_id=group_chat_id,
                 message_thread_id=ASSIGNMENT_TOPIC_ID,
                 text="🔔 Test pesan ke topik TUGAS"
             )
@@ -379,7 +472,7 @@ async def check_topics(update: Update, context: ContextTypes.DEFAULT_TYPE):
         # Test attendance topic  
         try:
             await context.bot.send_message(
-                chat_id=GROUP_CHAT_ID,
+                chat_id=group_chat_id,
                 message_thread_id=ATTENDANCE_TOPIC_ID,
                 text="🔔 Test pesan ke topik ABSENSI"
             )
@@ -392,7 +485,7 @@ async def check_topics(update: Update, context: ContextTypes.DEFAULT_TYPE):
         # Test tanpa topic
         try:
             await context.bot.send_message(
-                chat_id=GROUP_CHAT_ID,
+                chat_id=group_chat_id,
                 text="🔔 Test pesan tanpa topic"
             )
             topic_info += "\n✅ Berhasil mengirim test TANPA topic\n"
@@ -419,12 +512,16 @@ async def admin_help(update: Update, context: ContextTypes.DEFAULT_TYPE):
         "📊 MANAJEMEN DATA:\n"
         "• /admin_stats - Lihat statistik lengkap\n"
         "• /export_data - Export data ke CSV\n"
+        "   Filter: `status=alpha` `alpha>=2` `izin>=2` `dari=2025-01-01 sampai=2025-01-31` `gzip`\n"
         "• /list_warnings - Lihat daftar peringatan\n"
         "• /list_kehadiran - Kirim laporan kehadiran ke grup\n\n"
         
         "🔄 RESET & MAINTENANCE:\n"
         "• /reset_attendance confirm - Reset SEMUA data kehadiran\n"
-        "• /force_check - Paksa pengecekan kehadiran otomatis\n\n"
+        "• /force_check - Paksa pengecekan kehadiran otomatis\n"
+        "• /refresh_cache - Baca ulang data setelah edit manual di spreadsheet\n"
+        "• /refresh_classroom [course_id] - Ambil ulang data tugas & submission Classroom\n"
+        "• /google_stats - Statistik antrian & latency Google API\n\n"
         
         "👤 MANAJEMEN MURID:\n"
         "• `/manual_kick 123456789 Alasan` - Keluarkan murid manual\n"
@@ -465,16 +562,17 @@ async def admin_help(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def test_classroom(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Test koneksi Google Classroom"""
     try:
-        bot = AttendanceBot()
-        classroom_service = bot.initialize_classroom_service()
+        bot = await get_async_attendance_bot_for(update)
+        classroom_service = await bot.initialize_classroom_service()
         
         if not classroom_service:
             await update.message.reply_text("❌ Gagal menginisialisasi Google Classroom service")
             return
             
-        # Test dengan mengambil daftar courses
-        results = classroom_service.courses().list().execute()
-        courses = results.get('courses', [])
+        # Test dengan mengambil daftar courses (semua halaman)
+        courses = await run_google_io(
+            lambda: list(iter_items(classroom_service.courses().list, 'courses', fields=COURSE_FIELDS))
+        )
         
         if not courses:
             await update.message.reply_text("✅ Connected to Google Classroom, but no courses found")
@@ -493,10 +591,18 @@ async def test_classroom(update: Update, context: ContextTypes.DEFAULT_TYPE):
     except Exception as e:
         await update.message.reply_text(f"❌ Error connecting to Google Classroom: {e}")
 
-auto_reminder = None
+# Reminder otomatis per cohort: {chat_id cohort: ClassroomAutoReminder}
+auto_reminders = {}
+
+def get_auto_reminder(bot):
+    """ClassroomAutoReminder milik cohort bot (roster & email cohort itu sendiri)"""
+    reminder = auto_reminders.get(bot.cohort.chat_id)
+    if reminder is None:
+        reminder = auto_reminders[bot.cohort.chat_id] = ClassroomAutoReminder(bot.wrapped)
+    return reminder
+
 async def start_auto_reminder(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Mulai reminder otomatis harian"""
-    global auto_reminder
     user_id = update.effective_user.id
     
     if user_id not in ADMIN_IDS:
@@ -524,12 +630,9 @@ async def start_auto_reminder(update: Update, context: ContextTypes.DEFAULT_TYPE
     group_chat_id = context.args[1]
 
     try:
-        bot = AttendanceBot()
+        bot = await get_async_attendance_bot(cohort_registry.for_chat(int(group_chat_id)))
         
-        if auto_reminder is None:
-            auto_reminder = ClassroomAutoReminder(bot)
-        
-        result = auto_reminder.start_daily_reminders(context, course_id, group_chat_id)
+        result = get_auto_reminder(bot).start_daily_reminders(context, course_id, group_chat_id)
         await update.message.reply_text(result)
         
     except Exception as e:
@@ -537,24 +640,29 @@ async def start_auto_reminder(update: Update, context: ContextTypes.DEFAULT_TYPE
         await update.message.reply_text(f"❌ Error: {str(e)}")
 
 async def stop_auto_reminder(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Hentikan reminder otomatis"""
-    global auto_reminder
+    """Hentikan reminder otomatis (argumen group_chat_id: satu cohort, tanpa argumen: semua)"""
     user_id = update.effective_user.id
     
     if user_id not in ADMIN_IDS:
         await update.message.reply_text("❌ Hanya admin yang bisa menggunakan perintah ini.")
         return
 
-    if auto_reminder:
-        result = auto_reminder.stop_reminders()
-        auto_reminder = None
+    if context.args:
+        chat_ids = [cohort_registry.for_chat(int(context.args[0])).chat_id]
+    else:
+        chat_ids = list(auto_reminders)
+    running = [auto_reminders.pop(chat_id) for chat_id in chat_ids
+               if chat_id in auto_reminders and auto_reminders[chat_id].running]
+
+    if running:
+        for reminder in running:
+            result = reminder.stop_reminders()
         await update.message.reply_text(result)
     else:
         await update.message.reply_text("❌ Tidak ada reminder yang berjalan")
 
 async def test_auto_reminder(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Test reminder otomatis (langsung jalankan sekarang)"""
-    global auto_reminder
     user_id = update.effective_user.id
     
     if user_id not in ADMIN_IDS:
@@ -574,13 +682,10 @@ async def test_auto_reminder(update: Update, context: ContextTypes.DEFAULT_TYPE)
     group_chat_id = context.args[1]
 
     try:
-        bot = AttendanceBot()
+        bot = await get_async_attendance_bot(cohort_registry.for_chat(int(group_chat_id)))
         
-        if auto_reminder is None:
-            auto_reminder = ClassroomAutoReminder(bot)
-        
-        # Jalankan langsung sekarang (tanpa jadwal)
-        auto_reminder.check_and_send_reminders(context, course_id, group_chat_id)
+        # Jalankan langsung sekarang (tanpa jadwal), di luar event loop
+        await run_google_io(get_auto_reminder(bot).check_and_send_reminders, context, course_id, group_chat_id)
         await update.message.reply_text("✅ Test reminder telah dijalankan! Cek grup untuk melihat hasilnya.")
         
     except Exception as e:
@@ -614,29 +719,33 @@ async def classroom_reminder_now(update: Update, context: ContextTypes.DEFAULT_T
     await update.message.reply_text("🔄 Memeriksa tugas Classroom...")
 
     try:
-        bot = AttendanceBot()
+        bot = await get_async_attendance_bot(cohort_registry.for_chat(int(group_chat_id)))
         
         # Inisialisasi classroom service
-        classroom_service = bot.initialize_classroom_service()
+        classroom_service = await bot.initialize_classroom_service()
         if not classroom_service:
             await update.message.reply_text("❌ Gagal menginisialisasi Google Classroom service")
             return
         
         # Buat instance reminder temporary
-        auto_reminder_temp = ClassroomAutoReminder(bot)
-        
-        # Dapatkan detail tugas
-        assignment = classroom_service.courses().courseWork().get(
-            courseId=course_id,
-            courseWorkId=coursework_id
-        ).execute()
-        
-        students_without_submission, message = auto_reminder_temp.get_students_without_submission_for_coursework(
+        auto_reminder_temp = AsyncGoogleProxy(ClassroomAutoReminder(bot.wrapped))
+        
+        # Detail tugas dari snapshot Classroom; tugas yang tidak ada di snapshot diambil langsung
+        snapshot = await bot.get_classroom_snapshot(course_id)
+        assignment = snapshot.get_coursework(coursework_id) if snapshot else None
+        if assignment is None:
+            assignment = await run_google_io(classroom_service.courses().courseWork().get(
+                courseId=course_id,
+                courseWorkId=coursework_id,
+                fields=COURSEWORK_FIELDS
+            ).execute)
+        
+        students_without_submission, message = await auto_reminder_temp.get_students_without_submission_for_coursework(
             course_id, coursework_id
         )
         
         if students_without_submission:
-            reminder_message = auto_reminder_temp.format_reminder_message(
+            reminder_message = await auto_reminder_temp.format_reminder_message(
                 assignment, students_without_submission, course_id
             )
             # Kirim ke grup
@@ -671,10 +780,11 @@ async def get_all_member_ids(update: Update, context: ContextTypes.DEFAULT_TYPE)
 
         try:
             # Dapatkan informasi tentang chat (group)
-            chat = await context.bot.get_chat(GROUP_CHAT_ID)
+            group_chat_id = cohort_for(update).chat_id
+            chat = await context.bot.get_chat(group_chat_id)
             
             # Dapatkan semua member (perlu bot menjadi admin dengan permission melihat member)
-            async for member in context.bot.get_chat_members(GROUP_CHAT_ID):
+            async for member in context.bot.get_chat_members(group_chat_id):
                 total_members += 1
                 user = member.user
                 
@@ -774,7 +884,7 @@ async def get_simple_member_ids(update: Update, context: ContextTypes.DEFAULT_TY
         total_members = 0
 
         try:
-            async for member in context.bot.get_chat_members(GROUP_CHAT_ID):
+            async for member in context.bot.get_chat_members(cohort_for(update).chat_id):
                 total_members += 1
                 member_ids.append(str(member.user.id))
                 
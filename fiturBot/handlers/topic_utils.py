@@ -1,15 +1,16 @@
 import logging
 from telegram.ext import ContextTypes
-from config import GROUP_CHAT_ID, ANNOUNCEMENT_TOPIC_ID, ASSIGNMENT_TOPIC_ID, ATTENDANCE_TOPIC_ID
+from ..cohorts import cohort_registry
 
 logger = logging.getLogger(__name__)
 
-async def send_to_announcement_topic(context: ContextTypes.DEFAULT_TYPE, message: str, parse_mode='Markdown'):
-    """Mengirim pesan ke topik PENGUMUMAN & INFO"""
+async def send_to_announcement_topic(context: ContextTypes.DEFAULT_TYPE, message: str, parse_mode='Markdown', cohort=None):
+    """Mengirim pesan ke topik PENGUMUMAN & INFO (grup cohort, default cohort pertama)"""
+    cohort = cohort or cohort_registry.default
     try:
         await context.bot.send_message(
-            chat_id=GROUP_CHAT_ID,
-            message_thread_id=ANNOUNCEMENT_TOPIC_ID,
+            chat_id=cohort.chat_id,
+            message_thread_id=cohort.announcement_topic_id,
             text=message,
             parse_mode='Markdown'
         )
@@ -20,7 +21,7 @@ async def send_to_announcement_topic(context: ContextTypes.DEFAULT_TYPE, message
         # Fallback ke regular message
         try:
             await context.bot.send_message(
-            chat_id=GROUP_CHAT_ID,
+            chat_id=cohort.chat_id,
             text=message,
             parse_mode='Markdown'
             )
@@ -30,12 +31,13 @@ async def send_to_announcement_topic(context: ContextTypes.DEFAULT_TYPE, message
             logger.error(f"Gagal kirim tanpa topic: {e2}")
             return False
 
-async def send_to_assignment_topic(context: ContextTypes.DEFAULT_TYPE, message: str, parse_mode='Markdown'):
-    """Mengirim pesan ke topik TUGAS"""
+async def send_to_assignment_topic(context: ContextTypes.DEFAULT_TYPE, message: str, parse_mode='Markdown', cohort=None):
+    """Mengirim pesan ke topik TUGAS (grup cohort, default cohort pertama)"""
+    cohort = cohort or cohort_registry.default
     try:
         await context.bot.send_message(
-            chat_id=GROUP_CHAT_ID,
-            message_thread_id=ASSIGNMENT_TOPIC_ID,
+            chat_id=cohort.chat_id,
+            message_thread_id=cohort.assignment_topic_id,
             text=message,
             parse_mode=parse_mode
         )
@@ -43,17 +45,18 @@ async def send_to_assignment_topic(context: ContextTypes.DEFAULT_TYPE, message:
     except Exception as e:
         logger.error(f"Error sending to assignment topic: {e}")
         await context.bot.send_message(
-            chat_id=GROUP_CHAT_ID,
+            chat_id=cohort.chat_id,
             text=message,
             parse_mode=parse_mode
         )
 
-async def send_to_attendance_topic(context: ContextTypes.DEFAULT_TYPE, message: str, parse_mode='Markdown'):
-    """Mengirim pesan ke topik Perihal Absensi Kelas"""
+async def send_to_attendance_topic(context: ContextTypes.DEFAULT_TYPE, message: str, parse_mode='Markdown', cohort=None):
+    """Mengirim pesan ke topik Perihal Absensi Kelas (grup cohort, default cohort pertama)"""
+    cohort = cohort or cohort_registry.default
     try:
         await context.bot.send_message(
-            chat_id=GROUP_CHAT_ID,
-            message_thread_id=ATTENDANCE_TOPIC_ID,
+            chat_id=cohort.chat_id,
+            message_thread_id=cohort.attendance_topic_id,
             text=message,
             parse_mode=parse_mode
         )
@@ -61,7 +64,7 @@ async def send_to_attendance_topic(context: ContextTypes.DEFAULT_TYPE, message:
     except Exception as e:
         logger.error(f"Error sending to attendance topic: {e}")
         await context.bot.send_message(
-            chat_id=GROUP_CHAT_ID,
+            chat_id=cohort.chat_id,
             text=message,
             parse_mode=parse_mode
         )
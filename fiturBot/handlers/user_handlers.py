@@ -1,7 +1,8 @@
 from telegram import Update
 from telegram.ext import ContextTypes
 import logging
-from ..attendance_bot import AttendanceBot
+from ..attendance_bot import get_async_attendance_bot_for, AttendanceResult
+from ..cohorts import cohort_registry
 from config import ADMIN_IDS
 from datetime import datetime, timedelta, timezone
 import random
@@ -45,6 +46,7 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
             "/force_check - Paksa pengecekan kehadiran\n"
             "/export_data - Export data ke CSV\n"
             "/manual_kick - Keluarkan murid manual\n"
+            "/refresh_cache - Baca ulang data dari spreadsheet\n"
             "/list_kehadiran - Kirim laporan kehadiran ke grup\n"
             "/list_warnings - Lihat daftar peringatan\n"
             "`/start_reminder NzgxOTM4ODI5NTEz -1002408972369` - Memulai reminder classroom otomatis\n"
@@ -236,19 +238,19 @@ async def materi3(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def absen(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handler untuk absen dengan pilihan status dan notifikasi Total Hadir"""
     user_id = update.effective_user.id
-    bot = AttendanceBot()
+    bot = await get_async_attendance_bot_for(update)
     
     # Cek apakah user sudah terdaftar
-    df = bot.get_student_data()
-    if df.empty:
+    roster = await bot.get_roster()
+    if not len(roster):
             await update.message.reply_text(
                 "❌ **Sistem sedang sibuk, silakan coba lagi dalam beberapa detik.**"
             )
             return
         
-    student_data = df[df['Telegram ID'] == user_id]
+    _, student = await bot.find_student(user_id)
     
-    if student_data.empty:
+    if student is None:
         await update.message.reply_text(
             "❌ **Anda belum terdaftar dalam sistem!**\n\n"
             "Silakan daftar terlebih dahulu dengan:\n"
@@ -259,7 +261,6 @@ async def absen(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
         return
     
-    student = student_data.iloc[0]
     student_name = student['Nama']
 
     # Konversi ke integer untuk memastikan tipe data benar
@@ -307,25 +308,10 @@ async def absen(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
         return
     
-    # Update data di spreadsheet
-    success = bot.update_student_record(user_id, status_absen.capitalize())
+    # Update data kehadiran (hasil berisi nilai sebelum & sesudah, tanpa baca ulang sheet)
+    result = await bot.update_student_record(user_id, status_absen.capitalize())
     
-    if success:
-        # Dapatkan data terbaru untuk konfirmasi
-        df_updated = bot.get_student_data()
-        student_updated = df_updated[df_updated['Telegram ID'] == user_id].iloc[0]
-
-        # Konversi ke integer untuk data terbaru
-        try:
-            total_hadir_updated = int(student_updated['Total Hadir']) if 'Total Hadir' in student_updated else 0
-            total_alpha_updated = int(student_updated['Total Alpha'])
-            total_izin_updated = int(student_updated['Total Izin'])
-            
-        except (ValueError, TypeError):
-            total_hadir_updated = total_hadir
-            total_alpha_updated = total_alpha
-            total_izin_updated = total_izin
-        
+    if result:
         emoji = {
             'hadir': '✅',
             'izin': '⚠️', 
@@ -335,24 +321,24 @@ async def absen(update: Update, context: ContextTypes.DEFAULT_TYPE):
         
         message = (
             f"{emoji[status_absen]} **ABSENSI BERHASIL DICATAT**\n\n"
-            f"👤 **Nama:** {student_name}\n"
-            f"📝 **Status:** {status_absen.capitalize()}\n"
+            f"👤 **Nama:** {result.nama}\n"
+            f"📝 **Status:** {result.status}\n"
             f"🕐 **Waktu:** {waktu_wib}\n\n"
             f"📊 **Update Status:**\n"
-            f"• Total Hadir: {total_hadir_updated}x\n"
-            f"• Total Alpha: {total_alpha_updated}x\n"
-            f"• Total Izin: {total_izin_updated}x\n"
-            f"• Status Terakhir: {student_updated['Status Terakhir']}"
+            f"• Total Hadir: {result.hadir_after}x\n"
+            f"• Total Alpha: {result.alpha_after}x\n"
+            f"• Total Izin: {result.izin_after}x\n"
+            f"• Status Terakhir: {result.status_after}"
         )
 
         # Kirim notifikasi ke grup jika status hadir
         if status_absen == 'hadir':
-            await send_attendance_notification(context, user_id, student_name, total_hadir_updated)
+            await send_attendance_notification(context, result, bot.cohort)
         
         # Tambahkan peringatan jika perlu (dengan tipe data ya sudah di konversi)
         if status_absen == 'alpha':
             message += "\n\n⚠️ **PERINGATAN:** Alpha akan mempengaruhi status kehadiran Anda!"
-        elif status_absen == 'izin' and total_izin_updated >= 2:
+        elif status_absen == 'izin' and result.izin_after >= 2:
             message += "\n\n⚠️ **PERINGATAN:** Total izin Anda sudah 2x, hati-hati!"
         
         await update.message.reply_text(message)
@@ -362,7 +348,7 @@ async def absen(update: Update, context: ContextTypes.DEFAULT_TYPE):
             "Jika masalah berlanjut, hubungi admin."
         )
 
-async def send_attendance_notification(context: ContextTypes.DEFAULT_TYPE, user_id: int, student_name: str, total_hadir: int):
+async def send_attendance_notification(context: ContextTypes.DEFAULT_TYPE, result: AttendanceResult, cohort=None):
     """Mengirim notifikasi kehadiran ke grup dengan pantun lucu"""
     # Dapatkan hari Senin minggu ini
     today = datetime.now()
@@ -400,54 +386,42 @@ async def send_attendance_notification(context: ContextTypes.DEFAULT_TYPE, user_
 
     notification_message = (
         f"🎉 **NOTIFIKASI KEHADIRAN** 🎉\n\n"
-        f"User ID {user_id} atas nama {student_name}\n"
+        f"User ID {result.telegram_id} atas nama {result.nama}\n"
         f"Terima kasih telah hadir pada {tanggal_str}\n\n"
         f"**{motivasi}**\n\n"
-        f"📈 **Total Kehadiran:** {total_hadir}x\n\n"
+        f"📈 **Total Kehadiran:** {result.hadir_after}x\n\n"
         f"🎭 **Pantun Lucu:**\n{pantun}\n\n"
         f"🕐 _Waktu sistem: {get_wib_time().strftime('%d/%m/%Y %H:%M WIB')}_"
     )
     
-    GROUP_CHAT_ID = -1002408972369
+    cohort = cohort or cohort_registry.default
     try:
         await context.bot.send_message(
-            chat_id=GROUP_CHAT_ID,
+            chat_id=cohort.chat_id,
             text=notification_message
     )
-        logger.info(f"Notifikasi kehadiran terkirim untuk {student_name} pada {tanggal_str}")
+        logger.info(f"Notifikasi kehadiran terkirim untuk {result.nama} pada {tanggal_str}")
     except Exception as e:
         logger.error(f"Gagal mengirim notifikasi ke grup: {e}")
 
 async def status(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handler untuk melihat status"""
     user_id = update.effective_user.id
-    bot = AttendanceBot()
-    df = bot.get_student_data()
+    bot = await get_async_attendance_bot_for(update)
 
     # Jika admin, tampilkan semua data
     if user_id in ADMIN_IDS:
-        if df.empty:
+        summary = await bot.get_roster_summary()
+        if not summary['total_students']:
             await update.message.reply_text("❌ Tidak ada data murid.")
             return
         
-        # Konversi ke integer untuk perhitungan
-        try:
-            total_hadir = df['Total Hadir'].astype(int).sum() if 'Total Hadir' in df.columns else 0
-            total_alpha = df['Total Alpha'].astype(int).sum()
-            total_izin = df['Total Izin'].astype(int).sum()
-        except (ValueError, TypeError):
-            total_hadir = 0
-            total_alpha = 0
-            total_izin = 0
-            
-        total_students = len(df)
-        
         stats_message = (
             "👑 **STATUS ADMIN**\n\n"
-            f"• 👥 Total Murid: {total_students}\n"
-            f"• ✅ Total Hadir: {total_hadir}\n"
-            f"• ❌ Total Alpha: {total_alpha}\n"
-            f"• ⚠️ Total Izin: {total_izin}\n\n"
+            f"• 👥 Total Murid: {summary['total_students']}\n"
+            f"• ✅ Total Hadir: {summary['total_hadir']}\n"
+            f"• ❌ Total Alpha: {summary['total_alpha']}\n"
+            f"• ⚠️ Total Izin: {summary['total_izin']}\n\n"
             "Gunakan /admin_stats untuk info lebih detail\n"
             "Gunakan /list_warnings untuk lihat peringatan"
         )
@@ -455,9 +429,9 @@ async def status(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
     
     # Untuk user biasa
-    student_data = df[df['Telegram ID'] == user_id]
+    _, student = await bot.find_student(user_id)
     
-    if student_data.empty:
+    if student is None:
         await update.message.reply_text(
             "❌ **Anda belum terdaftar dalam sistem kehadiran.**\n\n"
             "Gunakan `/register NamaLengkap EmailAnda` untuk mendaftar.\n"
@@ -465,8 +439,6 @@ async def status(update: Update, context: ContextTypes.DEFAULT_TYPE):
             parse_mode='Markdown'
         )
         return
-    
-    student = student_data.iloc[0]
 
     # Konversi ke integer
     try:
@@ -500,13 +472,13 @@ async def status(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def test_connection(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Test koneksi Google Sheets"""
     try:
-        bot = AttendanceBot()
-        df = bot.get_student_data()
+        bot = await get_async_attendance_bot_for(update)
+        roster = await bot.get_roster()
         
-        if df.empty:
+        if not len(roster):
             await update.message.reply_text("❌ Tidak ada data di spreadsheet")
         else:
-            student_count = len(df)
+            student_count = len(roster)
             await update.message.reply_text(
                 f"✅ Koneksi Google Sheets BERHASIL!\n"
                 f"📊 Total murid terdaftar: {student_count}"
@@ -546,13 +518,12 @@ async def register(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
         return 
     
-    bot = AttendanceBot()
+    bot = await get_async_attendance_bot_for(update)
     
     # Cek apakah sudah terdaftar
-    df = bot.get_student_data()
-    existing_user = df[df['Telegram ID'] == user.id]
+    _, existing_user = await bot.find_student(user.id)
     
-    if not existing_user.empty:
+    if existing_user is not None:
         await update.message.reply_text(
             "✅ Anda sudah terdaftar dalam sistem!\n"
             f"User ID Anda: `{user.id}`",
@@ -574,10 +545,16 @@ async def register(update: Update, context: ContextTypes.DEFAULT_TYPE):
         if email:
             nama = ' '.join(context.args[:-1])
         
-        # Tambahkan ke spreadsheet
+        # Simpan ke store lokal, baris spreadsheet ditulis secara batch
         try:
             new_row = [nama, user.id, email, f"@{user.username}" if user.username else "-", 0, 0, 0, "Belum Absen", "Auto-registered"]
-            bot.worksheet.append_row(new_row)
+            if not await bot.register_student(new_row):
+                await update.message.reply_text(
+                    "✅ Anda sudah terdaftar dalam sistem!\n"
+                    f"User ID Anda: `{user.id}`",
+                    parse_mode='Markdown'
+                )
+                return
             
             confirmation_msg = (
                 f"✅ **Pendaftaran Berhasil!**\n\n"
@@ -0,0 +1,196 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Kolom spreadsheet yang punya slot sendiri di Student (kolom lain masuk ke `extra`)
+COLUMN_FIELDS = {
+    'Nama': 'nama',
+    'Telegram ID': 'telegram_id',
+    'Email': 'email',
+    'Username': 'username',
+    'Total Alpha': 'total_alpha',
+    'Total Izin': 'total_izin',
+    'Total Hadir': 'total_hadir',
+    'Status Terakhir': 'status_terakhir',
+    'Keterangan': 'keterangan',
+}
+INT_FIELDS = frozenset({'telegram_id', 'total_alpha', 'total_izin', 'total_hadir'})
+
+def parse_int(value):
+    """Nilai sel menjadi int ('' / bukan angka dianggap 0)"""
+    if isinstance(value, int):
+        return value
+    text = str(value).strip() if value is not None else ''
+    if not text:
+        return 0
+    try:
+        return int(text)
+    except ValueError:
+        try:
+            return int(float(text))
+        except ValueError:
+            return 0
+
+class Student:
+    """Satu baris murid dengan atribut tetap (__slots__).
+
+    Bisa dibaca seperti dict dengan nama kolom spreadsheet (student['Nama'],
+    student.get('Username')) agar handler lama tetap bekerja. Kolom yang tidak
+    ada di header bernilai None dan dianggap tidak ada (`'Total Hadir' in student`).
+    """
+
+    __slots__ = ('row',) + tuple(COLUMN_FIELDS.values()) + ('extra',)
+
+    def __init__(self, row, record):
+        self.row = row
+        for field in COLUMN_FIELDS.values():
+            setattr(self, field, None)
+        self.extra = None
+        self.apply_changes(record)
+
+    def apply_changes(self, changes):
+        """Set nilai beberapa kolom sekaligus ({nama_kolom: nilai})"""
+        for column, value in changes.items():
+            field = COLUMN_FIELDS.get(column)
+            if field is None:
+                if self.extra is None:
+                    self.extra = {}
+                self.extra[column] = value
+            elif field in INT_FIELDS:
+                setattr(self, field, parse_int(value))
+            else:
+                setattr(self, field, '' if value is None else str(value))
+
+    def __getitem__(self, column):
+        field = COLUMN_FIELDS.get(column)
+        value = getattr(self, field) if field else (self.extra or {}).get(column)
+        if value is None:
+            raise KeyError(column)
+        return value
+
+    def __contains__(self, column):
+        return self.get(column) is not None
+
+    def get(self, column, default=None):
+        try:
+            return self[column]
+        except KeyError:
+            return default
+
+    def to_dict(self, header):
+        """Record dict sesuai urutan header (untuk export / DataFrame)"""
+        return {column: self.get(column, '') for column in header}
+
+def _contribution(student):
+    """Sumbangan satu murid ke agregat: (hadir, alpha, izin, peringatan)"""
+    alpha = student.total_alpha or 0
+    izin = student.total_izin or 0
+    return student.total_hadir or 0, alpha, izin, int(alpha >= 2 or izin >= 2)
+
+class Roster:
+    """Daftar murid di memori + index Telegram ID dan email.
+
+    Total Hadir/Alpha/Izin dan jumlah murid dengan peringatan dijaga secara
+    inkremental oleh add() dan update(), sehingga summary() O(1). Perubahan
+    murid harus lewat update() agar agregat tetap benar; reconcile() menghitung
+    ulang dari nol untuk menangkap selisih.
+    """
+
+    def __init__(self, header):
+        self.header = list(header)
+        self.students = []
+        self.by_id = {}
+        self.by_email = {}
+        self._totals = {'total_hadir': 0, 'total_alpha': 0, 'total_izin': 0, 'warning_students': 0}
+
+    @classmethod
+    def from_records(cls, header, rows):
+        """Bangun dari [(nomor_baris, record dict), ...] milik RosterStore"""
+        roster = cls(header)
+        for row_number, record in rows:
+            roster.add(Student(row_number, record))
+        return roster
+
+    def add(self, student):
+        """Tambahkan murid dan masukkan ke index (ID/email ganda: baris pertama yang dipakai)"""
+        self.students.append(student)
+        self._count(student, 1)
+        if student.telegram_id and student.telegram_id not in self.by_id:
+            self.by_id[student.telegram_id] = student
+        email = (student.email or '').strip().lower()
+        if email and email not in self.by_email:
+            self.by_email[email] = student
+
+    def __len__(self):
+        return len(self.students)
+
+    def __iter__(self):
+        return iter(self.students)
+
+    def find(self, telegram_id):
+        return self.by_id.get(telegram_id)
+
+    def find_by_email(self, email):
+        return self.by_email.get(str(email or '').strip().lower())
+
+    def _count(self, student, sign):
+        hadir, alpha, izin, warning = _contribution(student)
+        totals = self._totals
+        totals['total_hadir'] += sign * hadir
+        totals['total_alpha'] += sign * alpha
+        totals['total_izin'] += sign * izin
+        totals['warning_students'] += sign * warning
+
+    def update(self, student, changes):
+        """Ubah kolom murid dan perbarui agregat (lepas sumbangan lama, tambah yang baru)"""
+        self._count(student, -1)
+        student.apply_changes(changes)
+        self._count(student, 1)
+
+    def summary(self):
+        """Jumlah murid, total counter, dan jumlah murid dengan peringatan (Alpha/Izin >= 2)"""
+        return {'total_students': len(self.students), **self._totals}
+
+    def recompute_summary(self):
+        """Hitung ulang summary() dengan membaca semua murid"""
+        total_hadir = total_alpha = total_izin = warning = 0
+        for student in self.students:
+            alpha = student.total_alpha or 0
+            izin = student.total_izin or 0
+            total_hadir += student.total_hadir or 0
+            total_alpha += alpha
+            total_izin += izin
+            warning += alpha >= 2 or izin >= 2
+        return {
+            'total_students': len(self.students),
+            'total_hadir': total_hadir,
+            'total_alpha': total_alpha,
+            'total_izin': total_izin,
+            'warning_students': warning,
+        }
+
+    def reconcile(self):
+        """Bandingkan agregat inkremental dengan hitung ulang penuh dan perbaiki jika beda.
+
+        Return {kolom: (inkremental, seharusnya)} untuk kolom yang meleset.
+        """
+        expected = self.recompute_summary()
+        drift = {key: (value, expected[key]) for key, value in self.summary().items() if value != expected[key]}
+        if drift:
+            logger.warning(f"⚠️ Agregat roster meleset, dikoreksi: {drift}")
+            self._totals = {key: expected[key] for key in self._totals}
+        return drift
+
+    def to_dataframe(self, columns=None):
+        """DataFrame untuk export / analitik (dibuat saat diminta, tidak di-cache)"""
+        import pandas as pd
+
+        columns = [col for col in (columns or self.header) if col in self.header]
+        data = {}
+        for column in columns:
+            field = COLUMN_FIELDS.get(column)
+            if field:
+                data[column] = [getattr(student, field) for student in self.students]
+            else:
+                data[column] = [student.get(column, '') for student in self.students]
+        return pd.DataFrame(data, columns=columns)
@@ -0,0 +1,122 @@
+import csv
+import gzip
+import io
+import itertools
+import operator
+import re
+import tempfile
+from dataclasses import dataclass, field
+from datetime import date
+
+# Export di bawah ukuran ini tetap di memori, lebih besar otomatis pindah ke file sementara
+SPOOL_MAX_SIZE = 1024 * 1024
+# Jumlah baris CSV yang ditulis per potongan
+EXPORT_CHUNK_ROWS = 500
+
+THRESHOLD_FIELDS = {'alpha': 'total_alpha', 'izin': 'total_izin', 'hadir': 'total_hadir'}
+OPERATORS = {'>=': operator.ge, '<=': operator.le, '=': operator.eq}
+_THRESHOLD_PATTERN = re.compile(r'^(alpha|izin|hadir)(>=|<=|=)(\d+)$')
+
+@dataclass
+class ExportFilter:
+    """Filter /export_data.
+
+    Contoh argumen: status=alpha alpha>=2 izin<=1 dari=2025-01-01 sampai=2025-01-31 gzip
+    Rentang tanggal (atau kata `riwayat`) mengexport riwayat absensi per sesi,
+    tanpa itu yang diexport data murid. Ambang counter selalu memakai total murid saat ini.
+    """
+    status: str = None
+    thresholds: list = field(default_factory=list)  # [(nama, operator, nilai)]
+    date_from: str = None
+    date_to: str = None
+    history: bool = False
+    compress: bool = False
+
+    @classmethod
+    def parse(cls, args):
+        """Bangun filter dari argumen command, ValueError jika ada argumen tidak valid"""
+        export_filter = cls()
+        for arg in args:
+            token = arg.strip().lower()
+            threshold = _THRESHOLD_PATTERN.match(token)
+            if threshold:
+                name, op, value = threshold.groups()
+                export_filter.thresholds.append((name, op, int(value)))
+            elif token in ('gzip', 'gz'):
+                export_filter.compress = True
+            elif token == 'riwayat':
+                export_filter.history = True
+            elif token.startswith('status='):
+                export_filter.status = token.split('=', 1)[1]
+            elif token.startswith(('dari=', 'sampai=')):
+                key, value = token.split('=', 1)
+                try:
+                    value = date.fromisoformat(value).isoformat()
+                except ValueError:
+                    raise ValueError(f"Tanggal tidak valid: {value} (format YYYY-MM-DD)") from None
+                if key == 'dari':
+                    export_filter.date_from = value
+                else:
+                    export_filter.date_to = value
+            else:
+                raise ValueError(f"Argumen tidak dikenal: {arg}")
+
+        if export_filter.date_from or export_filter.date_to:
+            export_filter.history = True
+        if export_filter.date_from and export_filter.date_to and export_filter.date_from > export_filter.date_to:
+            raise ValueError("Tanggal 'dari' harus sebelum 'sampai'")
+        return export_filter
+
+    def match_status(self, status):
+        """Status cocok jika diawali teks filter ('dikeluarkan' cocok dengan 'Dikeluarkan: ...')"""
+        return self.status is None or str(status or '').lower().startswith(self.status)
+
+    def match_thresholds(self, student):
+        """Cek ambang Total Alpha/Izin/Hadir murid (murid tidak dikenal hanya lolos tanpa ambang)"""
+        if not self.thresholds:
+            return True
+        if student is None:
+            return False
+        return all(
+            OPERATORS[op](getattr(student, THRESHOLD_FIELDS[name]) or 0, value)
+            for name, op, value in self.thresholds
+        )
+
+    def describe(self):
+        """Ringkasan filter untuk caption file"""
+        parts = []
+        if self.status:
+            parts.append(f"status={self.status}")
+        parts.extend(f"{name}{op}{value}" for name, op, value in self.thresholds)
+        if self.date_from or self.date_to:
+            parts.append(f"{self.date_from or '...'} s/d {self.date_to or '...'}")
+        return ', '.join(parts)
+
+def write_csv(header, rows, compress=False):
+    """Tulis header + rows (iterable/generator) ke SpooledTemporaryFile per potongan.
+
+    Return (file, jumlah_baris) dengan posisi file di awal; pemanggil yang menutup file.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    try:
+        target = gzip.GzipFile(fileobj=spool, mode='wb') if compress else spool
+        text = io.TextIOWrapper(target, encoding='utf-8', newline='')
+        writer = csv.writer(text, lineterminator='\n')
+        writer.writerow(header)
+        count = 0
+        rows = iter(rows)
+        while True:
+            chunk = list(itertools.islice(rows, EXPORT_CHUNK_ROWS))
+            if not chunk:
+                break
+            writer.writerows(chunk)
+            count += len(chunk)
+        text.flush()
+        text.detach()
+        if compress:
+            target.close()
+        spool.seek(0)
+        return spool, count
+    except Exception:
+        spool.close()
+        raise
@@ -0,0 +1,364 @@
+import json
+import logging
+import os
+import sqlite3
+from datetime import datetime
+from threading import Lock
+from config import ROSTER_DB_FILE, ATTENDANCE_JOURNAL_FILE
+from .roster import parse_int
+
+logger = logging.getLogger(__name__)
+
+# Absensi dengan status ini menambah 1 pada kolom counter-nya. Nilai counter di
+# outbox dihitung dari salinan lokal, jadi saat push/pull yang dipakai adalah
+# "+1 dari nilai di spreadsheet", bukan nilai absolutnya (edit manual admin tetap).
+COUNTER_COLUMNS = {'Alpha': 'Total Alpha', 'Izin': 'Total Izin'}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS students (
+    row_number INTEGER PRIMARY KEY,
+    telegram_id INTEGER,
+    email TEXT,
+    record TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_students_telegram_id ON students (telegram_id);
+CREATE TABLE IF NOT EXISTS outbox (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    telegram_id INTEGER NOT NULL,
+    status TEXT,
+    changes TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS registrations (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    row_number INTEGER NOT NULL,
+    row_values TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS attendance_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    telegram_id INTEGER NOT NULL,
+    nama TEXT,
+    session_date TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    mirrored INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_events_session ON attendance_events (session_date);
+CREATE INDEX IF NOT EXISTS idx_events_student ON attendance_events (telegram_id, session_date);
+CREATE INDEX IF NOT EXISTS idx_events_unmirrored ON attendance_events (id) WHERE mirrored = 0;
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+def _json_default(value):
+    """Nilai numpy (int64, ...) dari DataFrame menjadi tipe Python biasa"""
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+def _dumps(value):
+    return json.dumps(value, ensure_ascii=False, default=_json_default)
+
+def apply_pending(record, entries):
+    """Terapkan entri outbox [(status, changes), ...] berurutan di atas record, return record baru"""
+    record = dict(record)
+    for status, changes in entries:
+        for column, value in changes.items():
+            if COUNTER_COLUMNS.get(status) == column:
+                record[column] = parse_int(record.get(column)) + 1
+            else:
+                record[column] = value
+    return record
+
+def _normalize_id(telegram_id):
+    try:
+        return int(str(telegram_id).strip())
+    except (ValueError, TypeError):
+        return None
+
+class RosterStore:
+    """Penyimpanan utama data murid di SQLite lokal.
+
+    Tabel `students` berisi salinan baris spreadsheet (record disimpan sebagai
+    JSON dengan nama kolom sesuai header sheet), tabel `outbox` berisi absensi
+    yang belum di-push ke spreadsheet, dan tabel `registrations` berisi murid
+    baru yang belum ditambahkan ke spreadsheet. Tabel `attendance_events` adalah
+    riwayat absensi append-only per sesi (tanggal). Handler hanya membaca & menulis
+    ke sini; AttendanceBot.sync_with_sheet() yang mengirim perubahan ke
+    spreadsheet dan mengambil edit manual admin dari spreadsheet.
+    """
+
+    def __init__(self, path=ROSTER_DB_FILE, legacy_journal_path=ATTENDANCE_JOURNAL_FILE):
+        self.path = path
+        self._lock = Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        # WAL + synchronous FULL: absensi yang sudah dikonfirmasi tetap ada walau proses mati
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=FULL')
+        with self._conn:
+            self._conn.executescript(SCHEMA)
+        self._import_legacy_journal(legacy_journal_path)
+
+    def _import_legacy_journal(self, journal_path):
+        """Pindahkan absensi dari journal JSONL versi lama ke outbox (sekali saja)"""
+        if not journal_path or not os.path.exists(journal_path):
+            return
+        events = []
+        with open(journal_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    events.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+        with self._lock, self._conn:
+            for event in events:
+                self._conn.execute(
+                    'INSERT INTO outbox (telegram_id, status, changes, created_at) VALUES (?, ?, ?, ?)',
+                    (event['telegram_id'], event.get('status'), _dumps(event['changes']),
+                     event.get('timestamp') or datetime.now().isoformat())
+                )
+        os.replace(journal_path, journal_path + '.imported')
+        logger.info(f"📒 {len(events)} absensi dari journal lama dipindahkan ke {self.path}")
+
+    # ---------- meta ----------
+
+    def get_meta(self, key, default=None):
+        with self._lock:
+            row = self._conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set_meta(self, key, value):
+        with self._lock, self._conn:
+            self._conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, _dumps(value)))
+
+    # ---------- roster ----------
+
+    def has_snapshot(self):
+        """True jika data murid pernah diambil dari spreadsheet"""
+        return self.get_meta('header') is not None
+
+    def load_records(self):
+        """Return (header, [(nomor_baris, record), ...]) urut sesuai baris spreadsheet"""
+        with self._lock:
+            rows = self._conn.execute('SELECT row_number, record FROM students ORDER BY row_number').fetchall()
+        return self.get_meta('header'), [(row_number, json.loads(record)) for row_number, record in rows]
+
+    def replace_snapshot(self, header, records, modified_time=None):
+        """Ganti seluruh data murid dengan hasil baca spreadsheet.
+
+        Perubahan di outbox yang belum di-push diterapkan lagi di atas data baru
+        agar absensi lokal tidak tertimpa nilai lama dari spreadsheet, dan murid
+        yang pendaftarannya belum ditulis diletakkan lagi setelah baris terakhir.
+        """
+        with self._lock, self._conn:
+            pending = self._pending_entries()
+            seen = set()
+            self._conn.execute('DELETE FROM students')
+            for position, record in enumerate(records):
+                telegram_id = _normalize_id(record.get('Telegram ID'))
+                # Baris pertama yang dipakai jika ada ID ganda, sama seperti index di memori
+                if telegram_id in pending and telegram_id not in seen:
+                    record = apply_pending(record, pending[telegram_id])
+                seen.add(telegram_id)
+                self._insert_student(position + 2, record)
+
+            next_row = len(records) + 2
+            queued = self._conn.execute('SELECT seq, row_values FROM registrations ORDER BY seq').fetchall()
+            for seq, row_values in queued:
+                record = dict(zip(header, json.loads(row_values)))
+                telegram_id = _normalize_id(record.get('Telegram ID'))
+                if telegram_id in seen:
+                    # Sudah ditambahkan manual ke spreadsheet, pendaftaran lokal dibuang
+                    self._conn.execute('DELETE FROM registrations WHERE seq = ?', (seq,))
+                    continue
+                seen.add(telegram_id)
+                self._insert_student(next_row, apply_pending(record, pending.get(telegram_id, [])))
+                self._conn.execute('UPDATE registrations SET row_number = ? WHERE seq = ?', (next_row, seq))
+                next_row += 1
+            for key, value in (('header', header), ('modified_time', modified_time),
+                               ('pulled_at', datetime.now().isoformat())):
+                self._conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, _dumps(value)))
+
+    def _insert_student(self, row_number, record):
+        """Simpan satu baris murid (panggil dengan lock & transaksi)"""
+        self._conn.execute(
+            'INSERT INTO students (row_number, telegram_id, email, record) VALUES (?, ?, ?, ?)',
+            (row_number, _normalize_id(record.get('Telegram ID')),
+             str(record.get('Email') or '').strip().lower(), _dumps(record))
+        )
+
+    # ---------- registrations ----------
+
+    def queue_registration(self, record, row_values):
+        """Tambah murid baru setelah baris terakhir dan antrikan baris sheet-nya.
+
+        Return nomor baris spreadsheet yang akan ditempati murid tersebut.
+        """
+        with self._lock, self._conn:
+            last_row = self._conn.execute('SELECT MAX(row_number) FROM students').fetchone()[0]
+            row_number = (last_row or 1) + 1
+            self._insert_student(row_number, record)
+            self._conn.execute(
+                'INSERT INTO registrations (row_number, row_values, created_at) VALUES (?, ?, ?)',
+                (row_number, _dumps(list(row_values)), datetime.now().isoformat())
+            )
+        return row_number
+
+    def pending_registrations(self):
+        """Pendaftaran yang belum ditulis: [(seq, nomor_baris, row_values), ...] urut seq"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT seq, row_number, row_values FROM registrations ORDER BY seq'
+            ).fetchall()
+        return [(seq, row_number, json.loads(row_values)) for seq, row_number, row_values in rows]
+
+    def registration_count(self):
+        """Jumlah pendaftaran yang belum ditulis ke spreadsheet"""
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM registrations').fetchone()[0]
+
+    def drop_registrations(self, seqs):
+        """Hapus pendaftaran tertentu (sudah ada di spreadsheet) dari antrian"""
+        with self._lock, self._conn:
+            self._conn.executemany('DELETE FROM registrations WHERE seq = ?', [(seq,) for seq in seqs])
+
+    def mark_registrations_flushed(self, up_to_seq):
+        """Hapus pendaftaran yang sudah ditulis ke spreadsheet"""
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM registrations WHERE seq <= ?', (up_to_seq,))
+
+    # ---------- outbox ----------
+
+    def append(self, telegram_id, status, changes, session_date=None):
+        """Simpan perubahan murid ke roster lokal dan outbox dalam satu transaksi, return seq.
+
+        Jika session_date diisi, absensi juga dicatat di riwayat attendance_events.
+        """
+        with self._lock, self._conn:
+            now = datetime.now().isoformat()
+            row = self._conn.execute(
+                'SELECT row_number, record FROM students WHERE telegram_id = ? ORDER BY row_number LIMIT 1',
+                (telegram_id,)
+            ).fetchone()
+            record = json.loads(row[1]) if row is not None else {}
+            if row is not None:
+                self._conn.execute(
+                    'UPDATE students SET record = ? WHERE row_number = ?', (_dumps({**record, **changes}), row[0])
+                )
+            if session_date is not None:
+                self._conn.execute(
+                    'INSERT INTO attendance_events (telegram_id, nama, session_date, status, created_at) '
+                    'VALUES (?, ?, ?, ?, ?)',
+                    (telegram_id, record.get('Nama'), session_date, status, now)
+                )
+            cursor = self._conn.execute(
+                'INSERT INTO outbox (telegram_id, status, changes, created_at) VALUES (?, ?, ?, ?)',
+                (telegram_id, status, _dumps(changes), now)
+            )
+            return cursor.lastrowid
+
+    def pending_count(self):
+        """Jumlah perubahan yang belum di-push ke spreadsheet"""
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM outbox').fetchone()[0]
+
+    def _pending_entries(self, after_seq=0):
+        """{telegram_id: [(status, changes), ...]} outbox urut seq (panggil dengan lock)"""
+        entries = {}
+        for telegram_id, status, changes in self._conn.execute(
+            'SELECT telegram_id, status, changes FROM outbox WHERE seq > ? ORDER BY seq', (after_seq,)
+        ):
+            entries.setdefault(telegram_id, []).append((status, json.loads(changes)))
+        return entries
+
+    def pending_entries(self):
+        """Outbox per murid, return (seq_terakhir, [(telegram_id, [(status, changes), ...]), ...])"""
+        with self._lock:
+            last_seq = self._conn.execute('SELECT MAX(seq) FROM outbox').fetchone()[0] or 0
+            return last_seq, list(self._pending_entries().items())
+
+    def mark_flushed(self, up_to_seq, pushed=None):
+        """Hapus perubahan yang sudah ditulis ke spreadsheet.
+
+        pushed: {telegram_id: {kolom: nilai}} yang baru ditulis; record lokal
+        disamakan dengan nilai tersebut lalu outbox setelah up_to_seq diterapkan
+        lagi di atasnya. Return {telegram_id: record baru} untuk murid di pushed.
+        """
+        settled = {}
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM outbox WHERE seq <= ?', (up_to_seq,))
+            if not pushed:
+                return settled
+            remaining = self._pending_entries(up_to_seq)
+            for telegram_id, values in pushed.items():
+                row = self._conn.execute(
+                    'SELECT row_number, record FROM students WHERE telegram_id = ? ORDER BY row_number LIMIT 1',
+                    (telegram_id,)
+                ).fetchone()
+                if row is None:
+                    continue
+                record = apply_pending({**json.loads(row[1]), **values}, remaining.get(telegram_id, []))
+                self._conn.execute('UPDATE students SET record = ? WHERE row_number = ?', (_dumps(record), row[0]))
+                settled[telegram_id] = record
+        return settled
+
+    # ---------- riwayat absensi ----------
+
+    def _select_events(self, where, params, limit=-1):
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT id, telegram_id, nama, session_date, status, created_at FROM attendance_events '
+                f'WHERE {where} ORDER BY id LIMIT ?', (*params, limit)
+            ).fetchall()
+        return [
+            {'id': id_, 'telegram_id': telegram_id, 'nama': nama, 'session_date': session_date,
+             'status': status, 'created_at': created_at}
+            for id_, telegram_id, nama, session_date, status, created_at in rows
+        ]
+
+    def get_session_events(self, session_date):
+        """Semua absensi pada satu sesi (tanggal 'YYYY-MM-DD'), urut waktu"""
+        return self._select_events('session_date = ?', (session_date,))
+
+    def get_student_history(self, telegram_id, since=None):
+        """Riwayat absensi satu murid, opsional mulai tanggal sesi tertentu"""
+        if since is None:
+            return self._select_events('telegram_id = ?', (telegram_id,))
+        return self._select_events('telegram_id = ? AND session_date >= ?', (telegram_id, since))
+
+    def iter_events(self, date_from=None, date_to=None, batch_size=500):
+        """Generator riwayat absensi dalam rentang tanggal sesi (inklusif), dibaca per batch.
+
+        Lock hanya dipegang selama satu batch dibaca, jadi export besar tidak
+        menahan absensi yang masuk bersamaan.
+        """
+        where, params = ['id > ?'], []
+        if date_from:
+            where.append('session_date >= ?')
+            params.append(date_from)
+        if date_to:
+            where.append('session_date <= ?')
+            params.append(date_to)
+        last_id = 0
+        while True:
+            events = self._select_events(' AND '.join(where), (last_id, *params), batch_size)
+            yield from events
+            if len(events) < batch_size:
+                return
+            last_id = events[-1]['id']
+
+    def unmirrored_events(self, limit):
+        """Absensi yang belum disalin ke worksheet riwayat"""
+        return self._select_events('mirrored = 0', (), limit)
+
+    def mark_events_mirrored(self, event_ids):
+        with self._lock, self._conn:
+            self._conn.executemany('UPDATE attendance_events SET mirrored = 1 WHERE id = ?',
+                                   [(event_id,) for event_id in event_ids])
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,143 @@
+import functools
+import logging
+import random
+import time
+from threading import Lock
+from config import SHEETS_READS_PER_MINUTE, SHEETS_WRITES_PER_MINUTE, SHEETS_MAX_RETRIES
+
+logger = logging.getLogger(__name__)
+
+# Method gspread.Worksheet yang memakai kuota baca / tulis Sheets API
+READ_METHODS = frozenset({
+    'get', 'get_values', 'get_all_values', 'get_all_records', 'row_values',
+    'col_values', 'batch_get', 'acell', 'cell', 'find', 'findall',
+})
+WRITE_METHODS = frozenset({
+    'update', 'update_cell', 'update_cells', 'batch_update', 'append_row',
+    'append_rows', 'insert_row', 'insert_rows', 'delete_rows', 'clear', 'batch_clear',
+})
+# Write yang tidak idempotent: 5xx bisa terjadi setelah baris sudah tertulis, jadi
+# hanya 429 (request pasti ditolak) yang aman diulang
+NON_IDEMPOTENT_METHODS = frozenset({'append_row', 'append_rows', 'insert_row', 'insert_rows'})
+
+# Batas jeda backoff (detik) sebelum ditambah jitter
+BACKOFF_MAX = 32
+
+def _status_code(error):
+    """Kode HTTP dari error gspread/requests, None jika tidak ada"""
+    code = getattr(error, 'code', None)
+    if code is None:
+        code = getattr(getattr(error, 'response', None), 'status_code', None)
+    try:
+        return int(code)
+    except (TypeError, ValueError):
+        return None
+
+def may_have_been_written(error):
+    """True jika request tulis yang gagal mungkin sudah diterapkan Sheets (semua error selain 429)"""
+    return _status_code(error) != 429
+
+class TokenBucket:
+    """Token bucket: maksimal `per_minute` request, token diisi ulang merata setiap detik"""
+
+    def __init__(self, per_minute):
+        self.capacity = max(1, per_minute)
+        self.refill_per_second = self.capacity / 60
+        self._tokens = float(self.capacity)
+        self._updated_at = time.monotonic()
+        self._lock = Lock()
+
+    def acquire(self):
+        """Ambil satu token, tunggu jika habis. Return lama menunggu (detik)"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.refill_per_second)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.refill_per_second
+            time.sleep(delay)
+            waited += delay
+
+class SheetsQuota:
+    """Budget baca/tulis per menit untuk seluruh proses + retry 429/5xx dengan backoff.
+
+    Satu instance dipakai bersama oleh semua SheetsGateway karena kuota Google
+    dihitung per project, bukan per worksheet.
+    """
+
+    def __init__(self, reads_per_minute=SHEETS_READS_PER_MINUTE,
+                 writes_per_minute=SHEETS_WRITES_PER_MINUTE, max_retries=SHEETS_MAX_RETRIES):
+        self.buckets = {'read': TokenBucket(reads_per_minute), 'write': TokenBucket(writes_per_minute)}
+        self.max_retries = max_retries
+        self._lock = Lock()
+        self._stats = {
+            kind: {'calls': 0, 'throttled': 0, 'throttle_wait': 0.0, 'retries': 0,
+                   'rate_limited': 0, 'server_errors': 0, 'failures': 0}
+            for kind in self.buckets
+        }
+
+    def _count(self, kind, **increments):
+        with self._lock:
+            for key, value in increments.items():
+                self._stats[kind][key] += value
+
+    def call(self, kind, func, *args, **kwargs):
+        """Jalankan func setelah mendapat token; 429/5xx diulang dengan jittered exponential backoff.
+
+        Untuk method di NON_IDEMPOTENT_METHODS hanya 429 yang diulang.
+        """
+        name = getattr(func, '__name__', func)
+        retry_server_errors = name not in NON_IDEMPOTENT_METHODS
+        for attempt in range(self.max_retries + 1):
+            waited = self.buckets[kind].acquire()
+            self._count(kind, calls=1, throttled=int(waited > 0), throttle_wait=waited)
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                status = _status_code(e)
+                server_error = status is not None and 500 <= status < 600
+                retryable = status == 429 or (server_error and retry_server_errors)
+                self._count(kind, rate_limited=int(status == 429), server_errors=int(server_error))
+                if not retryable or attempt == self.max_retries:
+                    self._count(kind, failures=1)
+                    raise
+                delay = min(BACKOFF_MAX, 2 ** attempt) + random.uniform(0, 1)
+                self._count(kind, retries=1)
+                logger.warning(f"⏳ Sheets {status} pada {name}, retry {attempt + 1}/{self.max_retries} dalam {delay:.1f}s")
+                time.sleep(delay)
+
+    def get_stats(self):
+        """Statistik per jenis request: panggilan, throttle, retry, 429, 5xx, gagal"""
+        with self._lock:
+            return {kind: dict(stats) for kind, stats in self._stats.items()}
+
+class SheetsGateway:
+    """Pembungkus gspread.Worksheet yang melewatkan setiap request lewat SheetsQuota.
+
+    Dipakai persis seperti worksheet biasa; worksheet aslinya ada di `.worksheet`.
+    """
+
+    def __init__(self, worksheet, quota=None):
+        self.worksheet = worksheet
+        self._quota = quota or sheets_quota
+
+    def __getattr__(self, name):
+        attr = getattr(self.worksheet, name)
+        if name in READ_METHODS:
+            kind = 'read'
+        elif name in WRITE_METHODS:
+            kind = 'write'
+        else:
+            return attr
+
+        @functools.wraps(attr)
+        def wrapper(*args, **kwargs):
+            return self._quota.call(kind, attr, *args, **kwargs)
+        return wrapper
+
+# Instance global
+sheets_quota = SheetsQuota()
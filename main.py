@@ -1,4 +1,9 @@
 # main.py (Railway version - kembali ke polling)
+# Recorder dipasang sebelum import lain agar biaya import setiap module tercatat
+from startup_report import import_recorder
+import_recorder.install()
+
+import importlib
 import logging
 import traceback
 import os
@@ -13,6 +18,36 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+def lazy_handler(module_name, name):
+    """Callback yang baru meng-import module handler saat update pertama masuk"""
+    async def callback(update, context):
+        handler = getattr(importlib.import_module(module_name), name)
+        return await handler(update, context)
+    callback.__name__ = name
+    return callback
+
+async def on_startup(application):
+    """post_init: laporan biaya import, lalu daftarkan menu command"""
+    import_recorder.uninstall()
+    import_recorder.log_report()
+    await setup_bot_commands(application)
+
+async def warm_up_roster(context):
+    """Buka koneksi Google & muat roster di background setelah polling berjalan"""
+    try:
+        from fiturBot.attendance_bot import get_async_attendance_bot
+        from fiturBot.cohorts import cohort_registry
+
+        async def load_roster(cohort):
+            bot = await get_async_attendance_bot(cohort)
+            roster = await bot.get_roster()
+            logger.info(f"✅ Roster {cohort.name} ready - {len(roster)} records")
+
+        await cohort_registry.fan_out(load_roster)
+    except Exception as e:
+        logger.error(f"❌ Error testing connections: {e}")
+        # Continue anyway, as some features might still work
+
 async def setup_bot_commands(application):
     """Setup bot commands menu untuk semua user"""
     try:
@@ -74,38 +109,41 @@ async def setup_bot_commands(application):
     except Exception as e:
         logger.error(f"❌ Error setting bot commands: {e}")
 
+async def flush_pending_attendance(application):
+    """Push absensi yang masih di outbox lokal sebelum bot berhenti"""
+    try:
+        from fiturBot.attendance_bot import get_async_attendance_bot
+        from fiturBot.cohorts import cohort_registry
+        for cohort in cohort_registry:
+            bot = await get_async_attendance_bot(cohort)
+            await bot.flush_journal()
+        logger.info("✅ Pending attendance pushed on shutdown")
+    except Exception as e:
+        logger.error(f"❌ Error pushing pending attendance: {e}")
+
 def main():
     """Main function - Railway version (polling)"""
     try:
         # Import config
-        from config import validate_config, BOT_TOKEN
+        from config import validate_config, BOT_TOKEN, CONCURRENT_UPDATES
         if not validate_config():
             logger.error("❌ Config validation failed")
             return
         
-        # Test connections
-        logger.info("🔧 Testing connections...")
-        try:
-            from fiturBot.attendance_bot import AttendanceBot
-            bot = AttendanceBot()
-            df = bot.get_student_data()
-            logger.info(f"✅ Connected to Google Sheets - {len(df)} records")
-        except Exception as e:
-            logger.error(f"❌ Error testing connections: {e}")
-            # Continue anyway, as some features might still work
-        
         # Create application
-        application = Application.builder().token(BOT_TOKEN).build()
+        # Update diproses paralel; counter absensi dilindungi lock per murid di AttendanceBot
+        application = Application.builder().token(BOT_TOKEN).concurrent_updates(CONCURRENT_UPDATES).build()
         
         # Setup bot commands menu
-        application.post_init = setup_bot_commands
+        application.post_init = on_startup
+        application.post_shutdown = flush_pending_attendance
         
         # Import handlers
         try:
             from fiturBot.handlers import (
                 start, status, test_connection, get_my_info, register, absen, test_classroom, get_all_member_ids, get_simple_member_ids,
                 admin_help, admin_stats, reset_attendance, force_attendance_check, export_data,
-                manual_kick, list_warnings, list_kehadiran, classroom_reminder_now, class_reminder_now, check_topics, 
+                manual_kick, refresh_cache, refresh_classroom, google_stats, list_warnings, list_kehadiran, classroom_reminder_now, class_reminder_now, check_topics, 
                 materi, materi1, materi2, start_auto_reminder, stop_auto_reminder, test_auto_reminder, materi3
             )
             
@@ -127,6 +165,9 @@ def main():
                 ("force_check", force_attendance_check),
                 ("export_data", export_data),
                 ("manual_kick", manual_kick),
+                ("refresh_cache", refresh_cache),
+                ("refresh_classroom", refresh_classroom),
+                ("google_stats", google_stats),
                 ("list_warnings", list_warnings),
                 ("list_kehadiran", list_kehadiran),
                 ("classroom_reminder", classroom_reminder_now),
@@ -151,46 +192,40 @@ def main():
             logger.error(f"❌ Error setting up handlers: {e}")
             logger.error(traceback.format_exc())
         
-        # Import dan setup quiz handlers
+        # Setup quiz handlers (module quiz di-import saat update quiz pertama masuk)
         try:
-            from fiturBot.quiz_handler import (
-                start_command, help_command, quiz, quiz_callback_handler, handle_quiz_message,
-                quiz_help, start_quiz, surrender_quiz, next_question, 
-                show_score, show_points, top_score, quiz_rules, add_question_handler,
-                quiz_donate, quiz_report, create_question_start, quiz_stats, cancel_question
-            )
-            
-            # Add quiz command handlers
             quiz_commands = [
-                 ("start", start_command),
-                 ("help", help_command),
-                 ("quiz", quiz),
-                 ("mulai", start_quiz),
-                 ("nyerah", surrender_quiz),
-                 ("next", next_question),
-                 ("skor", show_score),
-                 ("poin", show_points),
-                 ("topskor", top_score),
-                 ("aturan", quiz_rules),
-                 ("stats", quiz_stats),
-                 ("tambah_pertanyaan", add_question_handler),
-                 ("donasi", quiz_donate),
-                 ("lapor", quiz_report),
-                 ("buat", create_question_start),
-                 ("batal", cancel_question),
+                 ("start", "start_command"),
+                 ("help", "help_command"),
+                 ("quiz", "quiz"),
+                 ("mulai", "start_quiz"),
+                 ("nyerah", "surrender_quiz"),
+                 ("next", "next_question"),
+                 ("skor", "show_score"),
+                 ("poin", "show_points"),
+                 ("topskor", "top_score"),
+                 ("aturan", "quiz_rules"),
+                 ("stats", "quiz_stats"),
+                 ("tambah_pertanyaan", "add_question_handler"),
+                 ("donasi", "quiz_donate"),
+                 ("lapor", "quiz_report"),
+                 ("buat", "create_question_start"),
+                 ("batal", "cancel_question"),
              ]
             
-            for command, handler in quiz_commands:
-                application.add_handler(CommandHandler(command, handler))
+            for command, handler_name in quiz_commands:
+                application.add_handler(CommandHandler(command, lazy_handler('fiturBot.quiz_handler', handler_name)))
                 logger.info(f"✅ Added quiz handler: /{command}")
 
             application.add_handler(MessageHandler(
                 filters.TEXT & ~filters.COMMAND, 
-                handle_quiz_message
+                lazy_handler('fiturBot.quiz_handler', 'handle_quiz_message')
             ), group=1)
             logger.info("✅ Added quiz message handler")
             
-            application.add_handler(CallbackQueryHandler(quiz_callback_handler, pattern="^quiz_"))
+            application.add_handler(CallbackQueryHandler(
+                lazy_handler('fiturBot.quiz_handler', 'quiz_callback_handler'), pattern="^quiz_"
+            ))
             logger.info("✅ Added quiz callback handler")
         
         except Exception as e:
@@ -201,8 +236,9 @@ def main():
             try:
                 from auto_functions import (
                     periodic_check, send_classroom_reminder, send_class_reminder, 
-                    reminder_tugas_classroom, reminder_tugas_mingguan
+                    reminder_tugas_classroom, reminder_tugas_mingguan, sync_roster_store
                 )
+                from config import ATTENDANCE_FLUSH_INTERVAL
                 # Schedule tasks
                 application.job_queue.run_daily(periodic_check, time=time(hour=8, minute=0))
                 application.job_queue.run_daily(periodic_check, time=time(hour=18, minute=0))
@@ -214,6 +250,12 @@ def main():
                 # Reminder tugas mingguan setiap Senin jam 09:00 WIB
                 application.job_queue.run_daily(reminder_tugas_mingguan, time=time(hour=2, minute=0), days=(0,))  # Senin 09:00 WIB
 
+                # Koneksi Google + roster dimuat di background, polling tidak menunggu
+                application.job_queue.run_once(warm_up_roster, when=0)
+
+                # Sync store lokal <-> spreadsheet (juga push sisa outbox saat startup)
+                application.job_queue.run_repeating(sync_roster_store, interval=ATTENDANCE_FLUSH_INTERVAL, first=1)
+
                 logger.info("✅ Scheduled tasks configured")
             except Exception as e:
                 logger.error(f"❌ Error setting up scheduled tasks: {e}")
@@ -0,0 +1,81 @@
+# startup_report.py - Laporan biaya import saat startup
+import builtins
+import logging
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+class ImportCostRecorder:
+    """Catat waktu import pertama setiap module selama startup.
+
+    Dipasang paling awal di main.py dengan membungkus builtins.__import__.
+    Waktu yang dicatat inklusif (termasuk module yang di-import di dalamnya);
+    `top_level` hanya berisi import yang tidak dipicu module lain sehingga
+    jumlahnya sama dengan total waktu import.
+    """
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.costs = {}        # {nama_module: detik}
+        self.top_level = {}    # {nama_module: detik}
+        self._depth = 0
+        self._thread = None
+        self._original_import = None
+
+    def install(self):
+        if self._original_import is None:
+            self._original_import = builtins.__import__
+            self._thread = threading.get_ident()
+            builtins.__import__ = self._import
+
+    def uninstall(self):
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        original = self._original_import or builtins.__import__
+        if threading.get_ident() != self._thread:
+            return original(name, globals, locals, fromlist, level)
+        module_name = name
+        if level:
+            # Import relatif: ubah ke nama absolut (from .roster import ... -> fiturBot.roster)
+            package = (globals or {}).get('__package__') or ''
+            base = package.rsplit('.', level - 1)[0] if level > 1 else package
+            module_name = f"{base}.{name}" if name else base
+
+        loaded_before = len(sys.modules)
+        self._depth += 1
+        started = time.perf_counter()
+        try:
+            return original(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - started
+            self._depth -= 1
+            # Hanya import yang benar-benar memuat module baru yang dicatat
+            if len(sys.modules) > loaded_before:
+                self.costs[module_name] = self.costs.get(module_name, 0) + elapsed
+                if self._depth == 0:
+                    self.top_level[module_name] = self.top_level.get(module_name, 0) + elapsed
+
+    def elapsed(self):
+        """Detik sejak recorder dibuat (kira-kira sejak proses mulai)"""
+        return time.perf_counter() - self.started_at
+
+    def report(self, limit=15):
+        """Baris laporan: total waktu import + import top-level termahal"""
+        total = sum(self.top_level.values())
+        lines = [f"📦 Import startup: {total * 1000:.0f} ms untuk {len(self.costs)} import "
+                 f"(startup total {self.elapsed() * 1000:.0f} ms)"]
+        for name, cost in sorted(self.top_level.items(), key=lambda item: item[1], reverse=True)[:limit]:
+            lines.append(f"   • {name}: {cost * 1000:.1f} ms")
+        return lines
+
+    def log_report(self, limit=15):
+        for line in self.report(limit):
+            logger.info(line)
+
+# Instance global
+import_recorder = ImportCostRecorder()
@@ -0,0 +1,80 @@
+"""Benchmark check_auto_kick_conditions: mask pandas/NumPy vs loop iterrows() versi lama.
+
+Jalankan dari root repo: python tests/bench_auto_kick.py [jumlah_murid]
+"""
+import random
+import sys
+import timeit
+import conftest  # noqa: F401  (env file lokal ke folder sementara sebelum config di-import)
+import pandas as pd
+from conftest import HEADER, student_row
+from fiturBot.attendance_bot import AttendanceBot
+from fiturBot.roster import Roster
+
+def legacy_check_auto_kick_conditions(df):
+    """Loop versi lama (sebelum vektorisasi), disalin apa adanya"""
+    students_to_kick = []
+    students_to_warn = []
+
+    for _, student in df.iterrows():
+        telegram_id = student['Telegram ID']
+        total_alpha = int(student['Total Alpha']) if pd.notna(student['Total Alpha']) else 0
+        total_izin = int(student['Total Izin']) if pd.notna(student['Total Izin']) else 0
+        nama = student['Nama']
+
+        if total_alpha >= 3 or total_izin >= 3:
+            students_to_kick.append({'telegram_id': telegram_id, 'nama': nama,
+                                     'alasan': f" Sudah Alpha {total_alpha} kali"})
+
+        if total_alpha >= 2 and total_izin >= 2:
+            students_to_kick.append({'telegram_id': telegram_id, 'nama': nama,
+                                     'alasan': f"Sudah Alpha {total_alpha} kali dan Izin {total_izin} kali "})
+
+        if total_izin >= 2 or total_alpha >= 2:
+            students_to_warn.append({'telegram_id': telegram_id, 'nama': nama,
+                                     'total_izin': total_izin, 'total_alpha': total_alpha})
+
+    return students_to_kick, students_to_warn
+
+class RosterOnlyBot:
+    """Cukup untuk menjalankan AttendanceBot.check_auto_kick_conditions tanpa spreadsheet"""
+
+    def __init__(self, roster):
+        self.roster = roster
+
+    def get_student_columns(self, columns):
+        return self.roster.to_dataframe(columns)
+
+def make_roster(size, seed=8):
+    rng = random.Random(seed)
+    rows = [
+        (position + 2, dict(zip(HEADER, student_row(100000 + position, alpha=rng.randint(0, 4), izin=rng.randint(0, 4)))))
+        for position in range(size)
+    ]
+    return Roster.from_records(HEADER, rows)
+
+def best_ms(func, repeat=5):
+    return min(timeit.repeat(func, number=1, repeat=repeat)) * 1000
+
+def main(size=10_000):
+    bot = RosterOnlyBot(make_roster(size))
+    columns = ['Telegram ID', 'Nama', 'Total Alpha', 'Total Izin']
+
+    kick, warn = AttendanceBot.check_auto_kick_conditions(bot)
+    legacy_kick, legacy_warn = legacy_check_auto_kick_conditions(bot.get_student_columns(columns))
+
+    # Hasil sama, kecuali loop lama memasukkan murid yang memenuhi dua aturan kick dua kali
+    assert {student['telegram_id'] for student in kick} == {student['telegram_id'] for student in legacy_kick}
+    assert len({student['telegram_id'] for student in kick}) == len(kick)
+    assert [student['telegram_id'] for student in warn] == [student['telegram_id'] for student in legacy_warn]
+
+    vectorised = best_ms(lambda: AttendanceBot.check_auto_kick_conditions(bot))
+    legacy = best_ms(lambda: legacy_check_auto_kick_conditions(bot.get_student_columns(columns)))
+
+    print(f"{size} murid: {len(kick)} kick (loop lama: {len(legacy_kick)} entri, "
+          f"{len(legacy_kick) - len(kick)} dobel), {len(warn)} peringatan")
+    print(f"loop iterrows (lama): {legacy:8.1f} ms")
+    print(f"mask pandas/NumPy   : {vectorised:8.1f} ms  ({legacy / vectorised:.0f}x lebih cepat)")
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000)
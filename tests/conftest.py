@@ -0,0 +1,118 @@
+import os
+import re
+import sys
+import tempfile
+
+# File lokal (SQLite, journal, snapshot Classroom) diarahkan ke folder sementara
+# sebelum config di-import
+_TMP_DIR = tempfile.mkdtemp(prefix='fiturbot-tests-')
+os.environ.setdefault('ROSTER_DB_FILE', os.path.join(_TMP_DIR, 'roster.db'))
+os.environ.setdefault('ATTENDANCE_JOURNAL_FILE', os.path.join(_TMP_DIR, 'attendance_journal.jsonl'))
+os.environ.setdefault('CLASSROOM_SNAPSHOT_DIR', os.path.join(_TMP_DIR, 'classroom_cache'))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import dataclasses
+import pytest
+from types import SimpleNamespace
+
+HEADER = ['Nama', 'Telegram ID', 'Email', 'Username', 'Total Alpha', 'Total Izin',
+          'Total Hadir', 'Status Terakhir', 'Keterangan']
+
+def student_row(telegram_id, nama=None, alpha=0, izin=0):
+    return [nama or f"Murid {telegram_id}", str(telegram_id), f"{telegram_id}@example.com", '',
+            str(alpha), str(izin), '0', '', '']
+
+class FakeAPIError(Exception):
+    """Seperti gspread APIError: kode HTTP ada di response.status_code"""
+
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.response = SimpleNamespace(status_code=status_code)
+
+def _column_index(letters):
+    index = 0
+    for letter in letters:
+        index = index * 26 + ord(letter) - 64
+    return index - 1
+
+class FakeWorksheet:
+    """Worksheet gspread tiruan di memori (nilai sel berupa string seperti get_values)"""
+
+    spreadsheet_id = 'fake-spreadsheet'
+
+    def __init__(self, rows, header=HEADER):
+        self.rows = [list(header)] + [list(row) for row in rows]
+        self.calls = []
+
+    def cell(self, row, column):
+        """Nilai sel (1-based) seperti yang terlihat di spreadsheet"""
+        values = self.rows[row - 1]
+        return values[column - 1] if column - 1 < len(values) else ''
+
+    def column(self, name):
+        index = self.rows[0].index(name)
+        return [row[index] for row in self.rows[1:]]
+
+    def get_values(self, *args, **kwargs):
+        self.calls.append('get_values')
+        return [list(row) for row in self.rows]
+
+    def row_values(self, row):
+        self.calls.append('row_values')
+        return list(self.rows[row - 1])
+
+    def col_values(self, column):
+        self.calls.append('col_values')
+        return [row[column - 1] if column - 1 < len(row) else '' for row in self.rows]
+
+    def batch_get(self, ranges, **kwargs):
+        self.calls.append('batch_get')
+        result = []
+        for a1_range in ranges:
+            match = re.match(r'([A-Z]+)(\d+):([A-Z]+)(\d*)$', a1_range)
+            column, start = _column_index(match.group(1)), int(match.group(2)) - 1
+            values = [[row[column]] if column < len(row) and row[column] != '' else [] for row in self.rows[start:]]
+            # Sheets API tidak mengembalikan baris kosong di akhir range
+            while values and not values[-1]:
+                values.pop()
+            result.append(values)
+        return result
+
+    def batch_update(self, data, **kwargs):
+        self.calls.append('batch_update')
+        for update in data:
+            match = re.match(r'([A-Z]+)(\d+)$', update['range'])
+            column, row = _column_index(match.group(1)), int(match.group(2)) - 1
+            while len(self.rows) <= row:
+                self.rows.append([''] * len(HEADER))
+            self.rows[row][column] = str(update['values'][0][0])
+
+    def append_rows(self, rows, **kwargs):
+        self.calls.append('append_rows')
+        first_row = len(self.rows) + 1
+        self.rows.extend([str(value) for value in row] for row in rows)
+        return {'updates': {'updatedRange': f"Sheet1!A{first_row}:I{len(self.rows)}"}}
+
+    def append_row(self, row, **kwargs):
+        return self.append_rows([row], **kwargs)
+
+@pytest.fixture
+def make_bot(tmp_path, monkeypatch):
+    """Buat AttendanceBot dengan worksheet tiruan & store SQLite di tmp_path, return (bot, worksheet)"""
+    from fiturBot import attendance_bot
+    from fiturBot.cohorts import cohort_registry
+
+    def factory(rows):
+        worksheet = FakeWorksheet(rows)
+        monkeypatch.setattr(attendance_bot.AttendanceBot, 'setup_sheets',
+                            lambda self: setattr(self, 'worksheet', worksheet))
+        monkeypatch.setattr(attendance_bot.AttendanceBot, 'setup_classroom',
+                            lambda self: setattr(self, 'classroom_manager', None))
+        # Tanpa Drive API: setiap pull dianggap spreadsheet berubah
+        monkeypatch.setattr(attendance_bot.AttendanceBot, '_get_sheet_modified_time', lambda self: None)
+        cohort = dataclasses.replace(cohort_registry.default, roster_db_file=str(tmp_path / 'roster.db'))
+        bot = attendance_bot.AttendanceBot(cohort)
+        bot.pull_from_sheet(force=True)
+        return bot, worksheet
+
+    return factory
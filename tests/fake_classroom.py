@@ -0,0 +1,138 @@
+from collections import Counter
+
+class FakeHttpError(Exception):
+    pass
+
+class FakeRequest:
+    """Seperti HttpRequest googleapiclient: execute() dihitung sebagai satu round trip"""
+
+    def __init__(self, service, kind, respond):
+        self.service = service
+        self.kind = kind
+        self.respond = respond
+
+    def execute(self):
+        self.service.calls[self.kind] += 1
+        return self.respond()
+
+class FakeBatch:
+    def __init__(self, service, callback):
+        self.service = service
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, request_id):
+        self.requests.append((request_id, request))
+
+    def execute(self):
+        self.service.calls['batch'] += 1
+        for request_id, request in self.requests:
+            self.service.calls[request.kind] += 1
+            try:
+                self.callback(request_id, request.respond(), None)
+            except FakeHttpError as e:
+                self.callback(request_id, None, e)
+
+class _Resource:
+    def __init__(self, service):
+        self.service = service
+
+class _CourseWork(_Resource):
+    def list(self, courseId, pageSize=None, pageToken=None, fields=None, **kwargs):
+        return self.service.page('courseWork.list', 'courseWork', self.service.coursework, pageSize, pageToken)
+
+    def get(self, courseId, id, fields=None, **kwargs):
+        work = next(work for work in self.service.coursework if work['id'] == id)
+        return FakeRequest(self.service, 'courseWork.get', lambda: work)
+
+    def studentSubmissions(self):
+        return _Submissions(self.service)
+
+class _Submissions(_Resource):
+    def list(self, courseId, courseWorkId, pageSize=None, pageToken=None, fields=None, states=None, **kwargs):
+        items = [
+            submission for submission in self.service.submissions
+            if courseWorkId in ('-', submission['courseWorkId']) and (not states or submission['state'] in states)
+        ]
+        return self.service.page('studentSubmissions.list', 'studentSubmissions', items, pageSize, pageToken)
+
+class _Students(_Resource):
+    def list(self, courseId, pageSize=None, pageToken=None, fields=None, **kwargs):
+        return self.service.page('students.list', 'students', self.service.students_in_course, pageSize, pageToken)
+
+    def get(self, courseId, userId, fields=None, **kwargs):
+        return FakeRequest(self.service, 'students.get', lambda: self.service.student(userId))
+
+class _UserProfiles(_Resource):
+    def get(self, userId, fields=None, **kwargs):
+        return FakeRequest(self.service, 'userProfiles.get', lambda: self.service.student(userId, left=True)['profile'])
+
+class FakeClassroom:
+    """Service Classroom tiruan untuk satu course; `calls` menghitung request per method.
+
+    Server membatasi isi satu halaman ke max_page_size (seperti API asli yang boleh
+    mengembalikan lebih sedikit dari pageSize), jadi pagination selalu teruji.
+    States submission: student i mengumpulkan tugas j jika (i + j) % 3 == 0.
+    """
+
+    def __init__(self, works=3, students=45, left_students=0, max_page_size=20):
+        self.max_page_size = max_page_size
+        self.calls = Counter()
+        self.coursework = [
+            {'id': f"w{j}", 'title': f"Tugas {j}", 'description': '', 'dueDate': {'year': 2030, 'month': 1, 'day': j + 1}}
+            for j in range(works)
+        ]
+        everyone = [
+            {'userId': f"u{i}", 'profile': {'name': {'fullName': f"Murid {i}"}, 'emailAddress': f"murid{i}@example.com"}}
+            for i in range(students + left_students)
+        ]
+        # Siswa terakhir sudah keluar course tetapi submission-nya masih ada
+        self.students_in_course = everyone[:students]
+        self.students_left = everyone[students:]
+        self.submissions = [
+            {'courseWorkId': work['id'], 'userId': student['userId'],
+             'state': 'TURNED_IN' if (i + j) % 3 == 0 else 'CREATED'}
+            for j, work in enumerate(self.coursework) for i, student in enumerate(everyone)
+        ]
+
+    def courses(self):
+        return self
+
+    def courseWork(self):
+        return _CourseWork(self)
+
+    def students(self):
+        return _Students(self)
+
+    def userProfiles(self):
+        return _UserProfiles(self)
+
+    def new_batch_http_request(self, callback):
+        return FakeBatch(self, callback)
+
+    def student(self, user_id, left=False):
+        for student in self.students_in_course + (self.students_left if left else []):
+            if student['userId'] == user_id:
+                return student
+        raise FakeHttpError(f"404 {user_id}")
+
+    def page(self, kind, key, items, page_size, page_token):
+        def respond():
+            start = int(page_token or 0)
+            end = start + min(page_size or self.max_page_size, self.max_page_size)
+            response = {key: items[start:end]}
+            if end < len(items):
+                response['nextPageToken'] = str(end)
+            return response
+        return FakeRequest(self, kind, respond)
+
+    def expected_unsubmitted(self):
+        """{nama: [judul tugas]} yang seharusnya dihasilkan unsubmitted_by_student()"""
+        names = {student['userId']: student['profile']['name']['fullName']
+                 for student in self.students_in_course + self.students_left}
+        titles = {work['id']: work['title'] for work in self.coursework}
+        expected = {}
+        for submission in self.submissions:
+            if submission['state'] != 'TURNED_IN':
+                expected.setdefault(names[submission['userId']], []).append(titles[submission['courseWorkId']])
+        return expected
@@ -0,0 +1,135 @@
+import pytest
+from conftest import FakeAPIError, FakeWorksheet, student_row
+from fiturBot.attendance_bot import HISTORY_HEADER
+
+def test_push_writes_counter_to_marked_student(make_bot):
+    bot, worksheet = make_bot([student_row(101), student_row(102, alpha=1)])
+
+    assert bot.update_student_record(102, 'Alpha')
+    assert bot.sync_with_sheet()
+
+    assert worksheet.cell(3, 5) == '2'
+    assert worksheet.cell(3, 8) == 'Alpha'
+    assert worksheet.cell(2, 5) == '0'
+    assert bot.store.pending_count() == 0
+
+def test_push_after_row_inserted_above_does_not_touch_other_student(make_bot):
+    bot, worksheet = make_bot([student_row(101), student_row(102)])
+    # Admin menyisipkan baris di atas murid setelah pull terakhir
+    worksheet.rows.insert(1, student_row(100, alpha=5))
+
+    assert bot.update_student_record(102, 'Alpha')
+    assert bot.sync_with_sheet()
+
+    assert worksheet.column('Telegram ID') == ['100', '101', '102']
+    assert worksheet.column('Total Alpha') == ['5', '0', '1']
+    assert worksheet.column('Status Terakhir') == ['', '', 'Alpha']
+    _, student = bot.find_student(102)
+    assert student.row == 4 and student.total_alpha == 1
+
+def test_push_is_deferred_when_row_cannot_be_confirmed(make_bot):
+    bot, worksheet = make_bot([student_row(101), student_row(102)])
+    assert bot.update_student_record(102, 'Alpha')
+    worksheet.rows.insert(1, student_row(99))
+    # Baris bergeser lagi tepat setelah pull ulang: tidak boleh ada sel yang ditulis
+    original_pull = bot.pull_from_sheet
+
+    def pull_then_shift(force=False):
+        pulled = original_pull(force)
+        worksheet.rows.insert(1, student_row(100))
+        return pulled
+
+    bot.pull_from_sheet = pull_then_shift
+    assert not bot.flush_journal()
+
+    assert 'batch_update' not in worksheet.calls
+    assert bot.store.pending_count() == 1
+
+def test_counter_edited_by_admin_is_incremented_not_overwritten(make_bot):
+    bot, worksheet = make_bot([student_row(101, izin=1)])
+    assert bot.update_student_record(101, 'Izin')
+    # Admin mengoreksi counter manual sebelum outbox di-push
+    worksheet.rows[1][5] = '0'
+
+    assert bot.sync_with_sheet()
+
+    assert worksheet.cell(2, 6) == '1'
+    _, student = bot.find_student(101)
+    assert student.total_izin == 1
+
+def test_admin_reset_is_written_as_absolute_value(make_bot):
+    bot, worksheet = make_bot([student_row(101, alpha=3)])
+
+    assert bot.apply_updates([(101, {'Total Alpha': 0})])
+
+    assert worksheet.cell(2, 5) == '0'
+
+def test_pull_rebases_pending_increment_on_sheet_value(make_bot):
+    bot, worksheet = make_bot([student_row(101, alpha=1)])
+    assert bot.update_student_record(101, 'Alpha')
+    worksheet.rows[1][4] = '4'
+
+    assert bot.pull_from_sheet(force=True)
+
+    _, student = bot.find_student(101)
+    assert student.total_alpha == 5
+
+def test_outbox_entry_of_deleted_student_is_dropped(make_bot):
+    bot, worksheet = make_bot([student_row(101), student_row(102)])
+    assert bot.update_student_record(102, 'Alpha')
+    # Admin menghapus baris murid sebelum absensinya di-push
+    del worksheet.rows[2]
+    assert bot.pull_from_sheet(force=True)
+
+    assert bot.flush_journal()
+
+    assert bot.store.pending_count() == 0
+    assert 'batch_update' not in worksheet.calls
+    assert worksheet.column('Telegram ID') == ['101']
+
+@pytest.mark.parametrize('status, written', [(503, True), (503, False), (429, False)])
+def test_failed_registration_append_is_not_duplicated(make_bot, status, written):
+    bot, worksheet = make_bot([student_row(101)])
+    assert bot.register_student(student_row(555))
+    original_append_rows = worksheet.append_rows
+
+    def failing_append_rows(rows, **kwargs):
+        # 5xx bisa datang setelah baris sudah tertulis di spreadsheet
+        worksheet.append_rows = original_append_rows
+        if written:
+            original_append_rows(rows, **kwargs)
+        raise FakeAPIError(status)
+
+    worksheet.append_rows = failing_append_rows
+    assert not bot.flush_journal()
+    assert bot.flush_journal()
+
+    assert worksheet.column('Telegram ID') == ['101', '555']
+    assert bot.store.registration_count() == 0
+    # Kolom ID hanya dicek setelah kegagalan yang mungkin sudah menulis baris
+    assert ('batch_get' in worksheet.calls) == (status != 429)
+
+@pytest.mark.parametrize('status, written', [(503, True), (503, False), (429, False)])
+def test_failed_history_mirror_is_not_duplicated(make_bot, status, written):
+    bot, _ = make_bot([student_row(101), student_row(102)])
+    history = bot.history_worksheet = FakeWorksheet([], header=HISTORY_HEADER)
+    assert bot.update_student_record(101, 'Hadir')
+    assert bot.update_student_record(102, 'Izin')
+    original_append_rows = history.append_rows
+
+    def failing_append_rows(rows, **kwargs):
+        history.append_rows = original_append_rows
+        if written:
+            original_append_rows(rows, **kwargs)
+        raise FakeAPIError(status)
+
+    history.append_rows = failing_append_rows
+    assert not bot.mirror_attendance_events()
+    assert bot.update_student_record(101, 'Alpha')
+    assert bot.mirror_attendance_events()
+
+    assert history.column('Telegram ID') == ['101', '102', '101']
+    assert history.column('Status') == ['Hadir', 'Izin', 'Alpha']
+    assert history.column('ID Event') == ['1', '2', '3']
+    assert bot.store.unmirrored_events(10) == []
+    assert ('col_values' in history.calls) == (status != 429)
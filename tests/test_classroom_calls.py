@@ -0,0 +1,69 @@
+import math
+import pytest
+from fake_classroom import FakeClassroom
+from fiturBot import classroom_manager
+from fiturBot.classroom_manager import ClassroomManager
+from fiturBot.classroom_snapshot import ClassroomSnapshotCache, fetch_snapshot
+
+def pages(items, page_size=20):
+    return math.ceil(items / page_size)
+
+def test_fetch_snapshot_lists_each_resource_once_across_pages():
+    service = FakeClassroom(works=3, students=45)
+
+    snapshot = fetch_snapshot(service, 'c')
+
+    # Satu listing per resource (halaman 20 item), tanpa students.get per submission
+    assert service.calls == {
+        'courseWork.list': pages(3),
+        'students.list': pages(45),
+        'studentSubmissions.list': pages(3 * 45),
+    }
+    assert len(snapshot.coursework) == 3
+    assert len(snapshot.students) == 45
+    assert sum(len(states) for states in snapshot.submissions.values()) == 3 * 45
+
+def test_fetch_snapshot_batches_profiles_of_students_who_left():
+    service = FakeClassroom(works=2, students=30, left_students=5)
+
+    snapshot = fetch_snapshot(service, 'c')
+
+    assert service.calls['batch'] == 1
+    assert service.calls['userProfiles.get'] == 5
+    assert 'students.get' not in service.calls
+    assert snapshot.students['u34'] == {'name': 'Murid 34', 'email': 'murid34@example.com'}
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    """ClassroomManager dengan FakeClassroom dan cache snapshot baru di tmp_path"""
+    service = FakeClassroom(works=20, students=150)
+    monkeypatch.setattr(classroom_manager, 'GOOGLE_CLASSROOM_AVAILABLE', True)
+    monkeypatch.setattr(classroom_manager.google_clients, 'get_service', lambda api_name, version: service)
+    monkeypatch.setattr(classroom_manager, 'classroom_snapshots', ClassroomSnapshotCache(600, str(tmp_path)))
+    return ClassroomManager('c'), service
+
+def test_get_unsubmitted_assignments_makes_no_per_submission_calls(manager):
+    manager, service = manager
+
+    unsubmitted = manager.get_unsubmitted_assignments()
+
+    assert unsubmitted == service.expected_unsubmitted()
+    # Versi lama: 1 + 20 listing submission + satu students.get per submission belum
+    # dikumpulkan (2000 untuk 20 tugas x 150 siswa); sekarang hanya listing berhalaman
+    assert service.calls == {
+        'courseWork.list': pages(20),
+        'students.list': pages(150),
+        'studentSubmissions.list': pages(20 * 150),
+    }
+    assert sum(service.calls.values()) == 1 + 8 + 150
+
+def test_reminder_methods_share_one_snapshot(manager):
+    manager, service = manager
+
+    manager.get_unsubmitted_assignments()
+    calls = sum(service.calls.values())
+    manager.get_all_active_assignments()
+    manager.get_upcoming_assignments()
+    manager.get_overdue_assignments()
+
+    assert sum(service.calls.values()) == calls
@@ -0,0 +1,130 @@
+import asyncio
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from conftest import student_row
+from fiturBot.google_executor import AsyncGoogleProxy, GoogleExecutor
+
+MARKS = 100
+
+def _marks(telegram_ids):
+    """100 absensi acak untuk beberapa murid, return (marks, total Alpha/Izin yang diharapkan)"""
+    rng = random.Random(13)
+    marks = [(rng.choice(telegram_ids), rng.choice(['Alpha', 'Izin', 'Hadir'])) for _ in range(MARKS)]
+    expected = {telegram_id: {'Alpha': 0, 'Izin': 0} for telegram_id in telegram_ids}
+    for telegram_id, status in marks:
+        if status != 'Hadir':
+            expected[telegram_id][status] += 1
+    return marks, expected
+
+def _assert_no_lost_increment(bot, results, expected):
+    """Sebelum sync: nilai yang dilaporkan ke murid berurutan 1..n tanpa duplikat"""
+    for telegram_id, totals in expected.items():
+        for status, field in (('Alpha', 'alpha_after'), ('Izin', 'izin_after')):
+            reported = sorted(getattr(result, field) for result in results
+                              if result.telegram_id == telegram_id and result.status == status)
+            assert reported == list(range(1, totals[status] + 1))
+        _, student = bot.find_student(telegram_id)
+        assert (student.total_alpha, student.total_izin) == (totals['Alpha'], totals['Izin'])
+
+def _assert_totals(bot, worksheet, expected):
+    for telegram_id, totals in expected.items():
+        _, student = bot.find_student(telegram_id)
+        assert (student.total_alpha, student.total_izin) == (totals['Alpha'], totals['Izin'])
+        row = worksheet.column('Telegram ID').index(str(telegram_id)) + 2
+        assert (worksheet.cell(row, 5), worksheet.cell(row, 6)) == (str(totals['Alpha']), str(totals['Izin']))
+    assert bot.get_roster_summary()['total_alpha'] == sum(totals['Alpha'] for totals in expected.values())
+    assert bot.store.pending_count() == 0
+
+def test_concurrent_marks_from_threads_keep_every_increment(make_bot):
+    bot, worksheet = make_bot([student_row(101), student_row(102), student_row(103)])
+    marks, expected = _marks([101, 102, 103])
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        results = list(pool.map(lambda mark: bot.update_student_record(*mark), marks))
+
+    assert all(results)
+    assert len(list(bot.store.iter_events())) == MARKS
+    _assert_no_lost_increment(bot, results, expected)
+    assert bot.sync_with_sheet()
+    _assert_totals(bot, worksheet, expected)
+
+def test_concurrent_marks_through_async_proxy_with_sync_in_between(make_bot):
+    bot, worksheet = make_bot([student_row(101), student_row(102)])
+    marks, expected = _marks([101, 102])
+    proxy = AsyncGoogleProxy(bot, GoogleExecutor(2, 'stress-google-io'), GoogleExecutor(8, 'stress-local-io'))
+
+    async def scenario():
+        # Handler PTB (concurrent_updates) + sync di background berjalan bersamaan
+        tasks = [proxy.update_student_record(telegram_id, status) for telegram_id, status in marks]
+        tasks[MARKS // 2:MARKS // 2] = [proxy.sync_with_sheet()]
+        return await asyncio.gather(*tasks)
+
+    results = asyncio.run(scenario())
+    pushed = results.pop(MARKS // 2)
+
+    assert pushed and all(results)
+    _assert_no_lost_increment(bot, results, expected)
+    assert bot.sync_with_sheet()
+    _assert_totals(bot, worksheet, expected)
+
+def _stored_record(bot, telegram_id):
+    _, rows = bot.store.load_records()
+    return next(record for _, record in rows if str(record.get('Telegram ID')) == str(telegram_id))
+
+def _run_in_window(target):
+    """Jalankan target di thread lain dan beri waktu untuk selesai di dalam jendela race.
+
+    Jika kode yang diuji memegang lock yang benar, target tertahan dan baru selesai
+    setelah jendela ditutup; thread-nya di-join oleh pemanggil.
+    """
+    thread = threading.Thread(target=target)
+    thread.start()
+    thread.join(0.2)
+    return thread
+
+def test_mark_between_mark_flushed_and_cache_patch_is_kept(make_bot):
+    bot, worksheet = make_bot([student_row(101)])
+    assert bot.update_student_record(101, 'Alpha')
+    threads = []
+    original_mark_flushed = bot.store.mark_flushed
+
+    def mark_flushed_then_mark(*args, **kwargs):
+        settled = original_mark_flushed(*args, **kwargs)
+        threads.append(_run_in_window(lambda: bot.update_student_record(101, 'Alpha')))
+        return settled
+
+    bot.store.mark_flushed = mark_flushed_then_mark
+    assert bot.flush_journal()
+    threads[0].join()
+
+    _, student = bot.find_student(101)
+    assert student.total_alpha == 2
+    assert _stored_record(bot, 101)['Total Alpha'] == 2
+    assert bot.get_roster_summary()['total_alpha'] == 2
+    assert bot.update_student_record(101, 'Alpha').alpha_after == 3
+
+def test_pull_between_read_and_record_of_a_mark_is_kept(make_bot):
+    bot, worksheet = make_bot([student_row(101)])
+    # Admin mengoreksi counter di spreadsheet, pull berikutnya terjadi di tengah absensi
+    worksheet.rows[1][4] = '4'
+    threads = []
+    original_find_student = bot.find_student
+
+    def find_student_then_pull(telegram_id):
+        found = original_find_student(telegram_id)
+        if not threads:
+            threads.append(_run_in_window(lambda: bot.pull_from_sheet(force=True)))
+        return found
+
+    bot.find_student = find_student_then_pull
+    assert bot.update_student_record(101, 'Alpha')
+    threads[0].join()
+    bot.find_student = original_find_student
+
+    _, student = bot.find_student(101)
+    assert student.total_alpha == 5
+    assert _stored_record(bot, 101)['Total Alpha'] == 5
+    assert bot.get_roster_summary()['total_alpha'] == 5
+    assert bot.sync_with_sheet()
+    assert worksheet.cell(2, 5) == '5'
@@ -0,0 +1,38 @@
+import asyncio
+import threading
+from fiturBot.google_executor import GoogleExecutor, AsyncGoogleProxy
+
+class FakeBot:
+    LOCAL_METHODS = frozenset({'find_student'})
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    def sync_with_sheet(self):
+        # Seperti push yang sedang menunggu backoff retry Sheets
+        self.release.wait(5)
+        return threading.current_thread().name
+
+    def find_student(self, telegram_id):
+        return threading.current_thread().name
+
+def test_local_methods_do_not_queue_behind_google_io():
+    google = GoogleExecutor(1, 'test-google-io')
+    local = GoogleExecutor(1, 'test-local-io')
+    bot = FakeBot()
+    proxy = AsyncGoogleProxy(bot, google, local)
+
+    async def scenario():
+        sync = asyncio.ensure_future(proxy.sync_with_sheet())
+        await asyncio.sleep(0.05)
+        # Pool Google penuh, pencarian lokal tetap langsung selesai
+        thread_name = await asyncio.wait_for(proxy.find_student(101), timeout=1)
+        bot.release.set()
+        return thread_name, await sync
+
+    local_thread, google_thread = asyncio.run(scenario())
+
+    assert local_thread.startswith('test-local-io')
+    assert google_thread.startswith('test-google-io')
+    assert google.get_stats()['calls'] == 1
+    assert local.get_stats()['calls'] == 1
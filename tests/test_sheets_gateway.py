@@ -0,0 +1,125 @@
+import pytest
+from conftest import FakeAPIError
+from fiturBot import sheets_gateway
+from fiturBot.sheets_gateway import SheetsGateway, SheetsQuota, TokenBucket
+
+class FakeClock:
+    """Pengganti modul time: sleep() hanya memajukan jam, tanpa menunggu"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+class FlakyWorksheet:
+    """Worksheet tiruan yang melempar error dari daftar `failures` sebelum berhasil"""
+
+    def __init__(self, failures=()):
+        self.failures = list(failures)
+        self.calls = 0
+
+    def _respond(self, result):
+        self.calls += 1
+        if self.failures:
+            raise FakeAPIError(self.failures.pop(0))
+        return result
+
+    def get_values(self):
+        return self._respond([['Nama']])
+
+    def batch_update(self, data, **kwargs):
+        return self._respond({'totalUpdatedCells': len(data)})
+
+    def append_rows(self, rows, **kwargs):
+        return self._respond({'updates': {'updatedRows': len(rows)}})
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(sheets_gateway, 'time', fake)
+    return fake
+
+def make_gateway(failures=(), max_retries=5, per_minute=6000):
+    worksheet = FlakyWorksheet(failures)
+    quota = SheetsQuota(reads_per_minute=per_minute, writes_per_minute=per_minute, max_retries=max_retries)
+    return SheetsGateway(worksheet, quota), worksheet, quota
+
+@pytest.mark.parametrize('status', [429, 500, 503])
+def test_rate_limit_and_server_errors_are_retried(clock, status):
+    gateway, worksheet, quota = make_gateway([status, status])
+
+    assert gateway.batch_update([{'range': 'A1', 'values': [['x']]}]) == {'totalUpdatedCells': 1}
+
+    assert worksheet.calls == 3
+    stats = quota.get_stats()['write']
+    assert stats['retries'] == 2 and stats['failures'] == 0
+    assert stats['rate_limited' if status == 429 else 'server_errors'] == 2
+
+def test_backoff_grows_exponentially_with_jitter(clock):
+    gateway, _, _ = make_gateway([429, 429, 429])
+
+    gateway.get_values()
+
+    assert [int(delay) for delay in clock.sleeps] == [1, 2, 4]
+
+def test_client_error_is_not_retried(clock):
+    gateway, worksheet, quota = make_gateway([400])
+
+    with pytest.raises(FakeAPIError):
+        gateway.get_values()
+
+    assert worksheet.calls == 1
+    assert clock.sleeps == []
+    assert quota.get_stats()['read']['failures'] == 1
+
+def test_gives_up_after_max_retries(clock):
+    gateway, worksheet, quota = make_gateway([429] * 10, max_retries=3)
+
+    with pytest.raises(FakeAPIError):
+        gateway.get_values()
+
+    assert worksheet.calls == 4
+    stats = quota.get_stats()['read']
+    assert stats['retries'] == 3 and stats['failures'] == 1
+
+def test_append_retries_rate_limit_but_not_server_error(clock):
+    gateway, worksheet, _ = make_gateway([429])
+    assert gateway.append_rows([['a']]) == {'updates': {'updatedRows': 1}}
+    assert worksheet.calls == 2
+
+    # 5xx bisa datang setelah baris tertulis: append tidak diulang agar tidak dobel
+    gateway, worksheet, _ = make_gateway([503])
+    with pytest.raises(FakeAPIError):
+        gateway.append_rows([['a']])
+    assert worksheet.calls == 1
+
+def test_token_bucket_throttles_after_budget_is_spent(clock):
+    gateway, worksheet, quota = make_gateway(per_minute=60)
+
+    for _ in range(65):
+        gateway.get_values()
+
+    # 60 token awal langsung terpakai, 5 request berikutnya menunggu 1 detik per token
+    assert worksheet.calls == 65
+    assert sum(clock.sleeps) == pytest.approx(5)
+    stats = quota.get_stats()['read']
+    assert stats['throttled'] == 5
+    assert stats['throttle_wait'] == pytest.approx(5)
+    # Budget tulis terpisah dari budget baca
+    assert quota.get_stats()['write']['calls'] == 0
+
+def test_token_bucket_refills_over_time(clock):
+    bucket = TokenBucket(per_minute=60)
+    for _ in range(60):
+        assert bucket.acquire() == 0
+
+    clock.now += 30
+
+    assert all(bucket.acquire() == 0 for _ in range(30))
+    assert bucket.acquire() == pytest.approx(1)